@@ -5,6 +5,8 @@ Author: Aidan McNay
 Date: September 19th, 2024
 """
 
+from typing import Literal
+
 from flow.flow import Flow
 from flow.run_flow import run_flow
 from github_steps.tag_repo import get_tagger
@@ -16,21 +18,25 @@ from records.tag_record import TagRecords, get_tag_headers
 # Define our flow
 # -----------------------------------------------------------------------------
 
+# Our labs, and the type of repository each is submitted in (and so should
+# be tagged in)
+LAB_REPO_TYPES: list[tuple[str, Literal["personal", "group"]]] = [
+    ("lab1.1", "personal"),
+    ("lab1.2", "personal"),
+    ("lab2a", "group"),
+    ("lab2b", "group"),
+    ("lab3a", "group"),
+    ("lab3b", "group"),
+    ("lab4a", "group"),
+    ("lab4b", "group"),
+    ("lab4c", "group"),
+]
+
 
 class LabTagRecords(TagRecords):
     """Define our labs to keep track of."""
 
-    labs = [
-        "lab1.1",
-        "lab1.2",
-        "lab2a",
-        "lab2b",
-        "lab3a",
-        "lab3b",
-        "lab4a",
-        "lab4b",
-        "lab4c",
-    ]
+    labs = [lab for lab, _ in LAB_REPO_TYPES]
     headers = get_tag_headers(labs)
 
 
@@ -55,36 +61,10 @@ access_flow.add_record_step("get-repos", GetTagRecords[LabTagRecords])
 # Propagate Steps
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-# Personal repo tagging
-access_flow.add_propagate_step(
-    "tag-lab1.1", get_tagger("lab1.1", "personal", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab1.2", get_tagger("lab1.2", "personal", LabTagRecords)
-)
-
-# Group repo tagging
-access_flow.add_propagate_step(
-    "tag-lab2a", get_tagger("lab2a", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab2b", get_tagger("lab2b", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab3a", get_tagger("lab3a", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab3b", get_tagger("lab3b", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab4a", get_tagger("lab4a", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab4b", get_tagger("lab4b", "group", LabTagRecords)
-)
-access_flow.add_propagate_step(
-    "tag-lab4c", get_tagger("lab4c", "group", LabTagRecords)
-)
+for lab, repo_type in LAB_REPO_TYPES:
+    access_flow.add_propagate_step(
+        f"tag-{lab}", get_tagger(lab, repo_type, LabTagRecords)
+    )
 
 # -----------------------------------------------------------------------------
 # Main Program
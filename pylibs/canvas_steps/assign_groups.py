@@ -303,10 +303,14 @@ class AssignGroups(FlowPropagateStep[StudentRecord]):
 
         # Don't match students already in a group
         nums_already_used: set[int] = set()
-        students_already_paired: list[str] = []
+        students_already_paired: set[str] = set()
+
+        # Also keep track of the existing groups by name, to find them later
+        groups_by_name: dict[str, list[canvasapi.group.Group]] = {}
 
         groups = curr_category.get_groups()
         for group in groups:
+            groups_by_name.setdefault(group.name, []).append(group)
             students = list(group.get_users())
             if len(students) > 1:
                 name = group.name
@@ -315,7 +319,7 @@ class AssignGroups(FlowPropagateStep[StudentRecord]):
 
                 nums_already_used.add(num)
                 for student in students:
-                    students_already_paired.append(student.login_id)
+                    students_already_paired.add(student.login_id)
 
         remaining_section_students_mapping = {
             sec: [
@@ -410,9 +414,8 @@ class AssignGroups(FlowPropagateStep[StudentRecord]):
                     )
                 else:
                     # Delete group
-                    for group in groups:
-                        if group.name == group_name:
-                            group.delete()
+                    for group in groups_by_name.get(group_name, []):
+                        group.delete()
 
                     # Create the group
                     new_group = curr_category.create_group(name=group_name)
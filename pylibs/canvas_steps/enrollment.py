@@ -171,7 +171,7 @@ class PingNewEnrollment(FlowPropagateStep[StudentRecord]):
         """
         # Make sure that we can access the email
         try:
-            Mailer(self.configs.send_email)
+            Mailer(self.configs.send_email).close()
         except Exception:
             raise Exception(
                 f"Couldn't log into '{self.configs.send_email}'"
@@ -230,4 +230,5 @@ class PingNewEnrollment(FlowPropagateStep[StudentRecord]):
             subject=self.configs.subject,
             body=email_body,
         )
+        mailer.close()
         logger(f"New enrollment sent to {self.configs.recv_email}")
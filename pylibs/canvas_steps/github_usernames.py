@@ -9,7 +9,7 @@ from threading import Lock
 from typing import Any, Callable, Optional, Self
 
 from canvas_steps import _course
-from github_steps import _github
+from github_steps import _get_user
 from flow.flow_steps import FlowUpdateStep
 from records.student_record import StudentRecord
 
@@ -28,7 +28,7 @@ def valid_username(username: str) -> bool:
         bool: Whether such a user exists on GitHub
     """
     try:
-        _github.get_user(username)
+        _get_user(username)
         return True
     except Exception:
         return False
@@ -59,7 +59,7 @@ class PingJoinGroup(FlowPropagateStep[StudentRecord]):
 
         # Make sure that we can access the email
         try:
-            Mailer(self.configs.send_email)
+            Mailer(self.configs.send_email).close()
         except Exception:
             raise Exception(
                 f"Couldn't log into '{self.configs.send_email}'"
@@ -159,6 +159,9 @@ class PingJoinGroup(FlowPropagateStep[StudentRecord]):
             email_template = f.read()
         signed_up_users = self.signed_up_users()
 
+        # Only log in once (and only if someone needs an email), reusing the
+        # connection for all emails
+        mailer: Optional[Mailer] = None
         for record, lock in records:
             with lock:
                 if (
@@ -178,7 +181,8 @@ class PingJoinGroup(FlowPropagateStep[StudentRecord]):
                             "<first_name>", record.first_name
                         ).replace("<last_name>", record.last_name)
 
-                        mailer = Mailer(self.configs.send_email)
+                        if mailer is None:
+                            mailer = Mailer(self.configs.send_email)
                         mailer.send(
                             recipient=recv_email,
                             subject=self.configs.subject,
@@ -189,3 +193,6 @@ class PingJoinGroup(FlowPropagateStep[StudentRecord]):
                             f"Emailed {record.netid} about not "
                             "being signed-up for a group"
                         )
+
+        if mailer is not None:
+            mailer.close()
@@ -1136,6 +1136,10 @@ class Flow(Generic[RecordType]):
         self.flow_log(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         self.flow_log(f"Number of threads: {str(self.configs['num_threads'])}")
 
+        # Metadata only describes the current iteration of the flow
+        with self._step_metadata_lock:
+            self.step_metadata = {}
+
         self.flow_log(f"Getting records from {self.record_storer_name}")
         records = self._get_records()
 
@@ -5,11 +5,11 @@ Date: January 6th, 2025
 """
 
 from typing import Any
-import yaml
 
 from flow.flow import Flow
 from flow.flow_logger import get_mngr_logger, MNGR
-from flow.schedule import Schedule
+from flow.schedule import get_curr_time, Schedule
+from flow.yaml_loader import load_yaml
 
 # -----------------------------------------------------------------------------
 # Manager Logger
@@ -137,8 +137,7 @@ class FlowManager:
         self._check_if_added(flow)
         if flow.configured:
             raise Exception(f"Flow {flow.name} is already configured")
-        with open(config_path, "r") as f:
-            configs = yaml.safe_load(f)
+        configs = load_yaml(config_path)
 
         flow.config(configs)
         for logfile in logfiles:
@@ -155,9 +154,11 @@ class FlowManager:
         This will check the schedules of all flows, and run them if
         appropriate (each on a separate process).
         """
+        # Check all schedules against the same time
+        now = get_curr_time()
         flows_to_run: list[Flow[Any]] = []
         for flow, schedule in self.flows:
-            if schedule.should_run():
+            if schedule.should_run(now):
                 flows_to_run.append(flow)
 
         if pathos_found:
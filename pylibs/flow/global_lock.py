@@ -33,8 +33,8 @@ class GLock:
         This will be created in the /tmp/courseflow directory, which will
         be created if it doesn't already exist.
         """
-        if not os.path.isdir(TMP_DIR_NAME):
-            os.mkdir(TMP_DIR_NAME)
+        # Another process may create the directory at the same time
+        os.makedirs(TMP_DIR_NAME, exist_ok=True)
 
         self.file_path = os.path.join(TMP_DIR_NAME, id)
         self.mode = mode
@@ -43,8 +43,8 @@ class GLock:
         else:
             self.lock_cmd = fcntl.LOCK_SH
 
-        # Create the file if it doesn't exist
-        with open(self.file_path, "w") as _:
+        # Create the file if it doesn't exist, without truncating it
+        with open(self.file_path, "a") as _:
             pass
 
     def __enter__(self: "GLock") -> "GLock":
@@ -5,67 +5,73 @@ Date: September 16th, 2024
 """
 
 import argparse
-from typing import TypeVar
-import yaml
+from typing import Optional, TypeVar
 
 from flow.flow import Flow
 
 # -----------------------------------------------------------------------------
-# run_flow
+# Argument Parser
 # -----------------------------------------------------------------------------
-# A wrapper around a flow to run it as a main script
+# The parser is the same for every flow (other than the description), so it's
+# only built once
 
-RecordType = TypeVar("RecordType")
+# The flow arguments, as (short flag, long flag, help, action, metavar)
+FLOW_ARGS = (
+    (
+        "-d",
+        "--dump",
+        "Dump a YAML file with documentation for the expected configurations",
+        "store",
+        "YAML_FILE",
+    ),
+    (
+        "-r",
+        "--run",
+        "Run the flow with the specified YAML file as configurations",
+        "store",
+        "YAML_FILE",
+    ),
+    (
+        "-v",
+        "--validate",
+        "Validate the flow (populate configurations, but don't run)",
+        "store",
+        "YAML_FILE",
+    ),
+    (
+        "-l",
+        "--logfile",
+        "A logfile to log results to",
+        "append",
+        "LOGFILE",
+    ),
+)
 
+_parser: Optional[argparse.ArgumentParser] = None
 
-def run_flow(flow: Flow[RecordType]) -> None:
-    """Run a flow as a main script.
 
-    Args:
-        flow (Flow): The flow to run
+def _build_parser() -> argparse.ArgumentParser:
+    """Get the argument parser for flows, building it on first use.
+
+    Returns:
+        argparse.ArgumentParser: The argument parser
     """
-    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-    # Define Arguments
-    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+    global _parser
+    if _parser is not None:
+        return _parser
 
     parser = argparse.ArgumentParser(
-        description=f"{flow.name}: {flow.description}",
         epilog="Generated by 'run_flow'",
         add_help=False,
+        allow_abbrev=False,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
     flow_args = parser.add_argument_group("Flow Arguments")
-    flow_args.add_argument(
-        "-d",
-        "--dump",
-        help=(
-            "Dump a YAML file with documentation for "
-            "the expected configurations"
-        ),
-        action="store",
-        metavar="YAML_FILE",
-    )
-    flow_args.add_argument(
-        "-r",
-        "--run",
-        help="Run the flow with the specified YAML file as configurations",
-        action="store",
-        metavar="YAML_FILE",
-    )
-    flow_args.add_argument(
-        "-v",
-        "--validate",
-        help="Validate the flow (populate configurations, but don't run)",
-        action="store",
-        metavar="YAML_FILE",
-    )
-    flow_args.add_argument(
-        "-l",
-        "--logfile",
-        help="A logfile to log results to",
-        action="append",
-        metavar="LOGFILE",
-    )
+    for short_flag, long_flag, help_msg, action, metavar in FLOW_ARGS:
+        flow_args.add_argument(
+            short_flag, long_flag, help=help_msg, action=action, metavar=metavar
+        )
 
     other_args = parser.add_argument_group("Other Arguments")
     other_args.add_argument(
@@ -78,6 +84,27 @@ def run_flow(flow: Flow[RecordType]) -> None:
         "-h", "--help", help="Show this message and exit", action="help"
     )
 
+    _parser = parser
+    return parser
+
+
+# -----------------------------------------------------------------------------
+# run_flow
+# -----------------------------------------------------------------------------
+# A wrapper around a flow to run it as a main script
+
+RecordType = TypeVar("RecordType")
+
+
+def run_flow(flow: Flow[RecordType]) -> None:
+    """Run a flow as a main script.
+
+    Args:
+        flow (Flow): The flow to run
+    """
+    parser = _build_parser()
+    parser.description = f"{flow.name}: {flow.description}"
+
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     # Parse Arguments
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -97,14 +124,17 @@ def run_flow(flow: Flow[RecordType]) -> None:
             f.write(flow.emit_config())
 
     elif args.validate:
-        with open(args.validate, "r") as f:
-            configs = yaml.safe_load(f)
+        # Only import the YAML parser when we need it, to keep --help fast
+        from flow.yaml_loader import load_yaml
+
+        configs = load_yaml(args.validate)
         flow.config(configs)
         print(f"{GREEN}Validated, ready to deploy!{RESET}")
 
     elif args.run:
-        with open(args.run, "r") as f:
-            configs = yaml.safe_load(f)
+        from flow.yaml_loader import load_yaml
+
+        configs = load_yaml(args.run)
         flow.config(configs)
         flow.run()
 
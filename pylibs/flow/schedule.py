@@ -5,11 +5,62 @@ Date: January 6th, 2025
 """
 
 from datetime import datetime
-from typing import Callable
+from typing import Callable, Optional
+
+# -----------------------------------------------------------------------------
+# get_curr_time
+# -----------------------------------------------------------------------------
+
+
+def get_curr_time() -> datetime:
+    """Get the current time, rounded down to the minute.
+
+    Returns:
+        datetime: The current time, rounded down to the minute
+    """
+    return datetime.now().replace(second=0, microsecond=0)
+
 
 # -----------------------------------------------------------------------------
 # Schedule
 # -----------------------------------------------------------------------------
+# Internally, a schedule is kept as a flat list of terms; a term is a
+# predicate to include times, along with predicates to exclude times from it.
+# The schedule runs whenever any of its terms do, allowing combined schedules
+# to be checked in one pass rather than through nested function calls.
+
+Predicate = Callable[[datetime], bool]
+Term = tuple[Predicate, tuple[Predicate, ...]]
+
+
+def _check_terms(terms: list[Term]) -> Predicate:
+    """Get a single predicate to check a list of terms.
+
+    Args:
+        terms (list[Term]): The terms of the schedule
+
+    Returns:
+        Predicate: A predicate that is true when any of the terms are
+    """
+    if len(terms) == 1 and not terms[0][1]:
+        return terms[0][0]
+
+    def check_time(curr_time: datetime) -> bool:
+        """Check whether any of the terms include the current time.
+
+        Args:
+            curr_time (datetime): The current time, rounded down to the minute
+
+        Returns:
+            bool: Whether any of the terms include the current time
+        """
+        return any(
+            include(curr_time)
+            and not any(exclude(curr_time) for exclude in excludes)
+            for include, excludes in terms
+        )
+
+    return check_time
 
 
 class Schedule:
@@ -27,18 +78,41 @@ class Schedule:
               that the given time is rounded to the nearest minute
         """
         self.check_time = check_time
+        self._terms: list[Term] = [(check_time, ())]
+
+    @staticmethod
+    def _combine(terms: list[Term]) -> "Schedule":
+        """Create a schedule from a list of terms.
+
+        Args:
+            terms (list[Term]): The terms of the new schedule
+
+        Returns:
+            Schedule: The schedule that runs when any of the terms do
+        """
+        schedule = Schedule(_check_terms(terms))
+        schedule._terms = terms
+        return schedule
 
     def _curr_time(self: "Schedule") -> datetime:
         """Get the current time, rounded down to the minute."""
-        return datetime.now().replace(second=0, microsecond=0)
+        return get_curr_time()
 
-    def should_run(self: "Schedule") -> bool:
+    def should_run(self: "Schedule", now: Optional[datetime] = None) -> bool:
         """Check whether a flow should be run, based on the current time.
 
+        Args:
+            now (Optional[datetime], optional): The current time, rounded
+              down to the minute. This allows many schedules to be checked
+              against the same time. Defaults to None, in which case the
+              current time is retrieved
+
         Returns:
             bool: Whether the associated flow should run
         """
-        return self.check_time(self._curr_time())
+        if now is None:
+            now = self._curr_time()
+        return self.check_time(now)
 
     def __add__(self: "Schedule", other: "Schedule") -> "Schedule":
         """Add two schedules to get the union of the two schedules.
@@ -49,7 +123,7 @@ class Schedule:
         Returns:
             Schedule: The union of the two schedules
         """
-        return Schedule(lambda x: self.check_time(x) or other.check_time(x))
+        return Schedule._combine(self._terms + other._terms)
 
     def __sub__(self: "Schedule", other: "Schedule") -> "Schedule":
         """Subtract two schedules to get the difference of the two schedules.
@@ -60,8 +134,16 @@ class Schedule:
         Returns:
             Schedule: The difference of the two schedules
         """
-        return Schedule(
-            lambda x: self.check_time(x) and (not other.check_time(x))
+        if all(not excludes for _, excludes in other._terms):
+            # Exclude each of the other schedule's predicates individually
+            other_excludes = tuple(include for include, _ in other._terms)
+        else:
+            other_excludes = (other.check_time,)
+        return Schedule._combine(
+            [
+                (include, excludes + other_excludes)
+                for include, excludes in self._terms
+            ]
         )
 
 
@@ -113,12 +195,12 @@ def check_daily_time(curr_time: datetime, hour: int) -> bool:
 
     Args:
         curr_time (datetime): The current time, rounded down to the minute
-        day_of_week (int): The hour to run at
+        hour (int): The hour to run at
 
     Returns:
         bool: Whether it's the top of the specified hour
     """
-    return check_hourly_time(curr_time) and curr_time.hour == hour
+    return curr_time.minute == 0 and curr_time.hour == hour
 
 
 class Daily(Schedule):
@@ -132,8 +214,19 @@ class Daily(Schedule):
         """
         if hour < 0 or hour > 23:
             raise Exception(f"Invalid hour: {hour}")
-        check_time = lambda x: check_daily_time(x, hour)
-        super().__init__(check_time)
+        self._hour = hour
+        super().__init__(self._check)
+
+    def _check(self: "Daily", curr_time: datetime) -> bool:
+        """Check whether it's currently the top of the scheduled hour.
+
+        Args:
+            curr_time (datetime): The current time, rounded down to the minute
+
+        Returns:
+            bool: Whether it's the top of the scheduled hour
+        """
+        return curr_time.minute == 0 and curr_time.hour == self._hour
 
 
 # -----------------------------------------------------------------------------
@@ -153,7 +246,9 @@ def check_weekly_time(curr_time: datetime, day_of_week: int, hour: int) -> bool:
         bool: Whether it's the top of the specified hour of a day
     """
     return (
-        check_daily_time(curr_time, hour) and curr_time.weekday() == day_of_week
+        curr_time.minute == 0
+        and curr_time.hour == hour
+        and curr_time.weekday() == day_of_week
     )
 
 
@@ -183,6 +278,20 @@ class Weekly(Schedule):
         day_lower = day.lower()
         if day_lower not in WEEKDAYS:
             raise Exception(f"Invalid day of the week: {day}")
-        day_of_week = WEEKDAYS.index(day_lower)
-        check_time = lambda x: check_weekly_time(x, day_of_week, hour)
-        super().__init__(check_time)
+        self._key = (WEEKDAYS.index(day_lower), hour)
+        super().__init__(self._check)
+
+    def _check(self: "Weekly", curr_time: datetime) -> bool:
+        """Check whether it's currently the top of the scheduled hour and day.
+
+        Args:
+            curr_time (datetime): The current time, rounded down to the minute
+
+        Returns:
+            bool: Whether it's the top of the scheduled hour and day
+        """
+        return (
+            curr_time.minute == 0
+            and curr_time.hour == self._key[1]
+            and curr_time.weekday() == self._key[0]
+        )
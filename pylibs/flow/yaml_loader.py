@@ -0,0 +1,200 @@
+"""Loading of YAML configuration files, with caching of parsed results.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+from collections import OrderedDict
+import copy
+from datetime import date, datetime
+import hashlib
+import json
+import os
+from threading import Lock
+from typing import Any, Optional, Union
+import yaml
+
+# Use the libyaml-backed loader when available, falling back to the
+# pure-Python implementation otherwise
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# -----------------------------------------------------------------------------
+# Caches
+# -----------------------------------------------------------------------------
+# Parsed configurations are cached by a hash of the file contents, so that
+# unchanged configurations don't need to be re-parsed. Additionally, the
+# hash for a path is remembered alongside the file's metadata, so that we can
+# skip reading and hashing files that haven't changed on disk.
+
+CACHE_SIZE = 64
+
+_yaml_cache: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+_stat_cache: dict[str, tuple[int, int, bytes]] = {}
+_cache_lock = Lock()
+
+# -----------------------------------------------------------------------------
+# JSON Sidecars
+# -----------------------------------------------------------------------------
+# Parsed configurations are also saved as JSON next to the YAML file (with a
+# ".json" suffix), as JSON is much faster to parse. A sidecar is only used if
+# it was generated from a YAML file with the same modification time and size.
+# Dates and datetimes (which JSON lacks) are tagged, and configurations that
+# don't otherwise survive a trip through JSON don't get a sidecar.
+
+SIDECAR_SUFFIX = ".json"
+
+
+def _encode_json(obj: object) -> dict[str, str]:
+    """Encode the values JSON doesn't natively support.
+
+    Args:
+        obj (object): The value to encode
+
+    Returns:
+        dict[str, str]: A JSON-serializable (tagged) representation of the
+          value
+
+    Raises:
+        TypeError: If the value can't be represented
+    """
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__date__": obj.isoformat()}
+    raise TypeError(f"Can't encode {type(obj).__name__} as JSON")
+
+
+def _decode_json(obj: dict[str, Any]) -> Union[datetime, date, dict[str, Any]]:
+    """Decode the values encoded by _encode_json.
+
+    Args:
+        obj (dict[str, Any]): A decoded JSON object
+
+    Returns:
+        Union[datetime, date, dict[str, Any]]: The original value
+    """
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def _read_sidecar(path: str, stat: os.stat_result) -> Optional[object]:
+    """Read the JSON sidecar for a YAML file, if it's up-to-date.
+
+    Args:
+        path (str): The path to the YAML file
+        stat (os.stat_result): The current metadata of the YAML file
+
+    Returns:
+        Optional[object]: The parsed configurations, or None if the sidecar
+          is missing or out-of-date
+    """
+    try:
+        with open(path + SIDECAR_SUFFIX, "rb") as f:
+            sidecar = json.loads(f.read(), object_hook=_decode_json)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(sidecar, dict)
+        or sidecar.get("mtime_ns") != stat.st_mtime_ns
+        or sidecar.get("size") != stat.st_size
+    ):
+        return None
+    return sidecar.get("configs")
+
+
+def _write_sidecar(path: str, stat: os.stat_result, configs: object) -> None:
+    """Write the JSON sidecar for a YAML file, if possible.
+
+    Args:
+        path (str): The path to the YAML file
+        stat (os.stat_result): The metadata of the YAML file when it was read
+        configs (object): The parsed configurations
+    """
+    sidecar = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "configs": configs,
+    }
+    try:
+        data = json.dumps(sidecar, default=_encode_json)
+    except (TypeError, ValueError):
+        return
+    if json.loads(data, object_hook=_decode_json) != sidecar:
+        return  # Ex. non-string keys or tuples wouldn't round-trip
+
+    # Write to a temporary file first, so readers never see a partial file
+    sidecar_path = path + SIDECAR_SUFFIX
+    tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, sidecar_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+# -----------------------------------------------------------------------------
+# load_yaml
+# -----------------------------------------------------------------------------
+
+
+def load_yaml(path: str) -> dict[str, Any]:
+    """Load the YAML configuration file at the given path.
+
+    Callers receive their own copy of the parsed data, and are free to
+    modify it.
+
+    Args:
+        path (str): The path to the YAML file
+
+    Returns:
+        dict[str, Any]: The parsed configurations in the file
+
+    Raises:
+        Exception: If the file doesn't contain a mapping of configurations
+    """
+    stat = os.stat(path)
+    with _cache_lock:
+        if path in _stat_cache:
+            mtime_ns, size, key = _stat_cache[path]
+            if (
+                mtime_ns == stat.st_mtime_ns
+                and size == stat.st_size
+                and key in _yaml_cache
+            ):
+                _yaml_cache.move_to_end(key)
+                return copy.deepcopy(_yaml_cache[key])
+
+    sidecar_configs = _read_sidecar(path, stat)
+    if isinstance(sidecar_configs, dict):
+        return sidecar_configs
+
+    with open(path, "rb") as f:
+        data = f.read()
+    key = hashlib.blake2b(data, digest_size=16).digest()
+
+    with _cache_lock:
+        _stat_cache[path] = (stat.st_mtime_ns, stat.st_size, key)
+        if key in _yaml_cache:
+            _yaml_cache.move_to_end(key)
+            return copy.deepcopy(_yaml_cache[key])
+
+    # Parse the raw bytes, so that decoding is done by the (C) loader rather
+    # than in Python
+    parsed = yaml.load(data, Loader=YamlLoader)
+    if not isinstance(parsed, dict):
+        raise Exception(f"{path} doesn't contain a mapping of configurations")
+
+    with _cache_lock:
+        _yaml_cache[key] = parsed
+        while len(_yaml_cache) > CACHE_SIZE:
+            _yaml_cache.popitem(last=False)
+    _write_sidecar(path, stat, parsed)
+    return copy.deepcopy(parsed)
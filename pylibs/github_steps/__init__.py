@@ -3,11 +3,28 @@
 Required environment variables:
  - GITHUB_API_KEY: Your API key for accessing GitHub
  - GITHUB_ORG: The organization to access
+
+The GitHub client and organization are created lazily on first use, so that
+importing a step (ex. to print a flow's help) doesn't require any network
+requests.
 """
 
+from datetime import datetime, timezone
+import functools
 import github
 import os
-from typing import cast
+import time
+from typing import Any, Callable, cast, Optional, ParamSpec, TypeVar
+
+from utils.lazy import Lazy
+from utils.parallel import NUM_WORKERS
+
+# -----------------------------------------------------------------------------
+# Common objects
+# -----------------------------------------------------------------------------
+
+# The number of items to request per page when listing (GitHub's maximum)
+PER_PAGE = 100
 
 if "AUTODOC_GEN" in os.environ:
     _name = cast(str, object())
@@ -18,9 +35,499 @@ else:
     # The GitHub organization name
     _name = os.environ["GITHUB_ORG"]
 
-    # Access to the GitHub API
+    # Access to the GitHub API. All steps share one client, so that its
+    # connection pool (sized for our concurrent calls) is reused. Larger pages
+    # also reduce the number of round-trips when listing
     _token = github.Auth.Token(os.environ["GITHUB_API_KEY"])
-    _github = github.Github(auth=_token)
+    _github = cast(
+        github.MainClass.Github,
+        Lazy(
+            lambda: github.Github(
+                auth=_token,
+                per_page=PER_PAGE,
+                retry=github.GithubRetry(total=5, backoff_factor=0.25),
+                pool_size=NUM_WORKERS,
+            )
+        ),
+    )
 
     # The specific organization for the class
-    _org = _github.get_organization(_name)
+    _org = cast(
+        github.Organization.Organization,
+        Lazy(lambda: _github.get_organization(_name)),
+    )
+
+# -----------------------------------------------------------------------------
+# _get_user
+# -----------------------------------------------------------------------------
+
+# The possible results of looking up a user on GitHub
+GitHubUser = (
+    github.NamedUser.NamedUser | github.AuthenticatedUser.AuthenticatedUser
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_user(login: str) -> GitHubUser:
+    """Get a user on GitHub, only requesting each user once.
+
+    Failed lookups aren't cached, and will be retried on the next call.
+
+    Args:
+        login (str): The username of the user
+
+    Returns:
+        GitHubUser: The corresponding user
+    """
+    return _github.get_user(login)
+
+
+# -----------------------------------------------------------------------------
+# _core_rate_limit
+# -----------------------------------------------------------------------------
+
+
+def _core_rate_limit() -> github.Rate.Rate:
+    """Get the current rate limit for GitHub's core (REST) API.
+
+    Newer versions of PyGithub wrap the rate limits in an overview (with the
+    limits under `resources`), whereas older versions return them directly.
+
+    Returns:
+        github.Rate.Rate: The core rate limit
+    """
+    limits = _github.get_rate_limit()
+    resources: Any = getattr(limits, "resources", limits)
+    return cast(github.Rate.Rate, resources.core)
+
+
+# -----------------------------------------------------------------------------
+# _plan_workers
+# -----------------------------------------------------------------------------
+
+
+def _plan_workers(num_calls: int, logger: Callable[[str], None]) -> int:
+    """Choose how many concurrent workers to use, based on the rate limit.
+
+    If the remaining rate limit can't cover all of the planned calls, the
+    number of workers is reduced proportionally, so that we degrade to
+    slower progress rather than exhausting the limit all at once.
+
+    Args:
+        num_calls (int): The estimated number of API calls to be made
+        logger (Callable[[str], None]): A function to log any notable events
+
+    Returns:
+        int: The number of workers to use
+    """
+    if num_calls == 0:
+        return 1
+    try:
+        core = _core_rate_limit()
+    except (github.GithubException, OSError):
+        return NUM_WORKERS  # Don't hold up work if we can't check
+    if core.remaining >= num_calls:
+        return NUM_WORKERS
+    logger(
+        f"Only {core.remaining} GitHub API calls remain (of ~{num_calls} "
+        f"needed) until {core.reset}; reducing concurrency"
+    )
+    return max(1, NUM_WORKERS * core.remaining // num_calls)
+
+
+# -----------------------------------------------------------------------------
+# _rate_limited_call
+# -----------------------------------------------------------------------------
+
+ParamsType = ParamSpec("ParamsType")
+ReturnType = TypeVar("ReturnType")
+
+# The number of times to wait for the rate limit before giving up
+RATE_LIMIT_WAITS = 2
+
+# How long (in seconds) to back off from a secondary rate limit without a
+# Retry-After (doubling for each wait), and the most to wait in total
+SECONDARY_BACKOFF = 60
+MAX_RATE_LIMIT_WAIT = 15 * 60
+
+
+def _rate_limit_delay(
+    e: github.RateLimitExceededException, attempt: int
+) -> float:
+    """Get how long to wait before retrying a rate-limited request.
+
+    Secondary rate limits are waited out as GitHub asks (with Retry-After,
+    or by backing off), whereas the primary limit is waited out until it
+    resets.
+
+    Args:
+        e (github.RateLimitExceededException): The rate limit exception
+        attempt (int): The number of previous waits for this request
+
+    Returns:
+        float: The number of seconds to wait
+    """
+    headers = {key.lower(): value for key, value in (e.headers or {}).items()}
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    core = _core_rate_limit()
+    if core.remaining == 0:
+        delay = (core.reset - datetime.now(timezone.utc)).total_seconds()
+        return max(delay, 0) + 1
+    return float(SECONDARY_BACKOFF * 2**attempt)
+
+
+def _rate_limited_call(
+    func: Callable[ParamsType, ReturnType],
+    *args: ParamsType.args,
+    **kwargs: ParamsType.kwargs,
+) -> ReturnType:
+    """Call a GitHub function, waiting for the rate limit if it's exceeded.
+
+    Rather than failing (and retrying on the next run of the flow), we wait
+    for the rate limit and try again, unless that would take too long.
+
+    Args:
+        func (Callable[ParamsType, ReturnType]): The function to call
+        args (ParamsType.args): The positional arguments to call it with
+        kwargs (ParamsType.kwargs): The keyword arguments to call it with
+
+    Returns:
+        ReturnType: What the function returned
+
+    Raises:
+        github.RateLimitExceededException: If the rate limit would take too
+          long to wait for
+    """
+    waited = 0.0
+    for attempt in range(RATE_LIMIT_WAITS):
+        try:
+            return func(*args, **kwargs)
+        except github.RateLimitExceededException as e:
+            delay = _rate_limit_delay(e, attempt)
+            if waited + delay > MAX_RATE_LIMIT_WAIT:
+                raise
+            time.sleep(delay)
+            waited += delay
+    return func(*args, **kwargs)
+
+
+# -----------------------------------------------------------------------------
+# _already_exists
+# -----------------------------------------------------------------------------
+
+
+def _already_exists(e: Exception, phrase: str) -> bool:
+    """Check whether GitHub rejected a request as already done.
+
+    GitHub responds with a 422 when creating something that already exists
+    (ex. a repository with the same name, or inviting an existing member),
+    but also for other unprocessable requests (ex. invalid names, or going
+    over the invitation rate limit). Only the former is recognized, by
+    looking for the given phrase in the error's messages.
+
+    Args:
+        e (Exception): The exception raised by a request
+        phrase (str): The phrase (case-insensitive) that GitHub's error
+          message contains when the request was already done
+
+    Returns:
+        bool: Whether the request failed because it was already done
+    """
+    if not isinstance(e, github.GithubException) or e.status != 422:
+        return False
+    if not isinstance(e.data, dict):
+        return False
+
+    messages = [e.data.get("message")]
+    for error in e.data.get("errors") or []:
+        messages.append(
+            error.get("message") if isinstance(error, dict) else error
+        )
+    phrase = phrase.lower()
+    return any(
+        isinstance(message, str) and phrase in message.lower()
+        for message in messages
+    )
+
+
+# -----------------------------------------------------------------------------
+# _list_repo_descrs
+# -----------------------------------------------------------------------------
+
+
+def _list_repo_descrs() -> dict[str, Optional[str]]:
+    """List the names and descriptions of all repositories in the org.
+
+    Pages are requested conditionally (see etag_cache), so that unchanged
+    pages from previous runs are neither re-downloaded nor counted against
+    the rate limit. This is preferred over GraphQL, which can select only
+    these fields but can't be requested conditionally, and so would cost
+    points on every run.
+
+    Returns:
+        dict[str, Optional[str]]: A mapping of repository names to their
+          descriptions
+    """
+    # Imported here, as etag_cache itself depends on this package.
+    # All listings of repos must keep the same keys, as they share the
+    # cached pages
+    from github_steps.etag_cache import list_conditional
+
+    return {
+        repo["name"]: repo.get("description")
+        for repo in list_conditional(
+            f"/orgs/{_name}/repos", keys=("name", "description")
+        )
+    }
+
+
+def _list_repo_names() -> list[str]:
+    """List the names of all repositories in the organization.
+
+    Returns:
+        list[str]: The names of all repositories in the organization
+    """
+    return list(_list_repo_descrs())
+
+
+# -----------------------------------------------------------------------------
+# Listings
+# -----------------------------------------------------------------------------
+# Results are returned as frozensets, as they are shared between steps through
+# flow metadata (see below)
+
+
+def _member_logins() -> frozenset[str]:
+    """Get the logins of all members of the organization.
+
+    Returns:
+        frozenset[str]: The logins of all members
+    """
+    return frozenset(user.login for user in _org.get_members())
+
+
+def _collaborator_logins() -> frozenset[str]:
+    """Get the logins of all outside collaborators of the organization.
+
+    Returns:
+        frozenset[str]: The logins of all outside collaborators
+    """
+    return frozenset(user.login for user in _org.get_outside_collaborators())
+
+
+def _invitation_ids() -> dict[str, int]:
+    """Get the pending invitations to the organization of GitHub users.
+
+    Invitations sent by email (without a GitHub user) are skipped.
+
+    Returns:
+        dict[str, int]: A mapping of the (lowercase) logins of invited users to
+          the IDs of their invitations
+    """
+    # GitHub logins are case-insensitive
+    return {
+        invitation.login.lower(): invitation.id
+        for invitation in _org.invitations()
+        if invitation.login is not None
+    }
+
+
+def _cancel_invitation(invitation_id: int) -> None:
+    """Cancel a pending invitation to the organization.
+
+    PyGithub's cancel_invitation takes a user (whose ID isn't the
+    invitation's) and ignores failures, so the request is made directly.
+
+    Args:
+        invitation_id (int): The ID of the invitation to cancel
+    """
+    _org._requester.requestJsonAndCheck(
+        "DELETE", f"{_org.url}/invitations/{invitation_id}"
+    )
+
+
+def _team_member_logins(slug: str) -> frozenset[str]:
+    """Get the logins of all members of a team in the organization.
+
+    Args:
+        slug (str): The slug of the team
+
+    Returns:
+        frozenset[str]: The logins of the team's members
+    """
+    return frozenset(
+        user.login for user in _org.get_team_by_slug(slug).get_members()
+    )
+
+
+def _lower_repo_names() -> frozenset[str]:
+    """Get the (lowercase) names of all repositories in the organization.
+
+    Returns:
+        frozenset[str]: The lowercase names of all repositories
+    """
+    # GitHub repo names are case-insensitive
+    return frozenset(name.lower() for name in _list_repo_names())
+
+
+# -----------------------------------------------------------------------------
+# Shared listings
+# -----------------------------------------------------------------------------
+# Listings that multiple steps need are shared through flow metadata, so that
+# only the first step in a flow iteration to need them makes the requests
+
+
+def _get_listing(
+    key: str,
+    list_func: Callable[[], frozenset[str]],
+    get_metadata: Callable[[str], Any],
+    set_metadata: Callable[[str, Any], None],
+) -> frozenset[str]:
+    """Get an org-wide listing, listing it only if it isn't already shared.
+
+    Args:
+        key (str): The metadata key the listing is shared under
+        list_func (Callable[[], frozenset[str]]): A function to make the
+          listing
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        frozenset[str]: The listing
+    """
+    listing = get_metadata(key)
+    if listing is None:
+        listing = list_func()
+        set_metadata(key, listing)
+    return cast(frozenset[str], listing)
+
+
+def _drop_listings(
+    keys: list[str], set_metadata: Callable[[str, Any], None]
+) -> None:
+    """Drop shared listings, so that later steps list them again.
+
+    This should be called after a step modifies the organization, so that
+    later steps in the same flow iteration don't act on stale listings.
+
+    Args:
+        keys (list[str]): The metadata keys of the listings to drop
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+    """
+    for key in keys:
+        set_metadata(key, None)
+
+
+def _get_member_logins(
+    get_metadata: Callable[[str], Any], set_metadata: Callable[[str, Any], None]
+) -> frozenset[str]:
+    """Get the logins of all members of the organization.
+
+    Args:
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        frozenset[str]: The logins of all members
+    """
+    return _get_listing(
+        "org_member_logins", _member_logins, get_metadata, set_metadata
+    )
+
+
+def _get_collaborator_logins(
+    get_metadata: Callable[[str], Any], set_metadata: Callable[[str, Any], None]
+) -> frozenset[str]:
+    """Get the logins of all outside collaborators of the organization.
+
+    Args:
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        frozenset[str]: The logins of all outside collaborators
+    """
+    return _get_listing(
+        "org_collaborator_logins",
+        _collaborator_logins,
+        get_metadata,
+        set_metadata,
+    )
+
+
+def _get_invitation_ids(
+    get_metadata: Callable[[str], Any], set_metadata: Callable[[str, Any], None]
+) -> dict[str, int]:
+    """Get the pending invitations to the organization of GitHub users.
+
+    Args:
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        dict[str, int]: A mapping of the (lowercase) logins of invited users to
+          the IDs of their invitations
+    """
+    invitation_ids = cast(
+        Optional[dict[str, int]], get_metadata("org_invitation_ids")
+    )
+    if invitation_ids is None:
+        invitation_ids = _invitation_ids()
+        set_metadata("org_invitation_ids", invitation_ids)
+    return invitation_ids
+
+
+def _get_repo_names(
+    get_metadata: Callable[[str], Any], set_metadata: Callable[[str, Any], None]
+) -> frozenset[str]:
+    """Get the (lowercase) names of all repositories in the organization.
+
+    Args:
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        frozenset[str]: The lowercase names of all repositories
+    """
+    return _get_listing(
+        "org_repo_names", _lower_repo_names, get_metadata, set_metadata
+    )
+
+
+def _get_team_logins(
+    slug: str,
+    get_metadata: Callable[[str], Any],
+    set_metadata: Callable[[str, Any], None],
+) -> frozenset[str]:
+    """Get the logins of all members of a team in the organization.
+
+    Args:
+        slug (str): The slug of the team
+        get_metadata (Callable[[str], Any]): A function to retrieve global
+          metadata previously set in the flow
+        set_metadata (Callable[[str, Any], None]): A function to set global
+          metadata within the flow
+
+    Returns:
+        frozenset[str]: The logins of the team's members
+    """
+    team_logins = cast(
+        Optional[dict[str, frozenset[str]]], get_metadata("team_logins")
+    )
+    if team_logins is None or slug not in team_logins:
+        logins = _team_member_logins(slug)
+        set_metadata("team_logins", {**(team_logins or {}), slug: logins})
+        return logins
+    return team_logins[slug]
@@ -8,9 +8,11 @@ import github
 from threading import Lock
 from typing import Any, Callable, cast, Self, Type
 
-from github_steps import _github, _org
+from github_steps import _get_user, _org, _plan_workers
+from github_steps.etag_cache import list_conditional
 from flow.flow_steps import FlowPropagateStep, ValidConfigTypes
 from records.student_record import StudentRecord
+from utils.parallel import prefetch, run_parallel
 
 # -----------------------------------------------------------------------------
 # AddToGroupRepos
@@ -51,7 +53,23 @@ class AddToGroupRepos(FlowPropagateStep[StudentRecord]):
             raise Exception(
                 "<num> not present in format; all teams would be identical!"
             )
-        return
+
+        # Split the format (and build the number's format spec) once, so
+        # names can be formed with a single join
+        self._name_parts: list[str] = self.configs.name_format.split("<num>")
+        self._num_format = f"0{self.configs.num_places}d"
+
+    def get_team_name(self: Self, num: int) -> str:
+        """Get the name of the team/repo for a group number.
+
+        Args:
+            self (Self): The relevant propagate step
+            num (int): The group number
+
+        Returns:
+            str: The name of the group's team/repo
+        """
+        return format(num, self._num_format).join(self._name_parts)
 
     def propagate_records(
         self: Self,
@@ -76,89 +94,173 @@ class AddToGroupRepos(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        # Remove users from old teams
         old_groups_metadata = cast(dict[str, int], get_metadata("old_groups"))
         if old_groups_metadata is None:
             old_groups = {}
         else:
             old_groups = old_groups_metadata
+
+        # Find the students to remove from old teams and add to new ones in
+        # a single pass, collecting the teams and users we'll need so that
+        # they can be fetched concurrently up front. Students being removed
+        # from an old team are also considered for adding, as removal will
+        # mark them as no longer added
+        team_slugs: set[str] = set()
+        usernames: set[str] = set()
+        to_remove: list[tuple[StudentRecord, Lock, str, str]] = []
+        to_add: list[tuple[StudentRecord, Lock, str, str]] = []
         for record, lock in records:
             with lock:
-                if (
-                    record.enrolled
-                    and (record.github_username is not None)
-                    and record.netid in old_groups
-                ):
-                    old_group_name = self.configs.name_format.replace(
-                        "<num>",
-                        str(old_groups[record.netid]).zfill(
-                            self.configs.num_places
-                        ),
-                    )
-                    group_team = _org.get_team_by_slug(old_group_name)
-                    user = _github.get_user(record.github_username)
-                    if isinstance(
-                        user,
-                        github.AuthenticatedUser.AuthenticatedUser,
+                if not record.enrolled:
+                    continue
+                if record.github_username is None:
+                    if (
+                        record.github_accepted
+                        and record.group_repo_name
+                        and (not record.added_to_group)
                     ):
-                        logger(f"Avoiding removing {user.login} (yourself?)")
-                        continue
-                    else:
-                        if user.login in [
-                            member.login for member in group_team.get_members()
-                        ]:
-                            group_team.remove_membership(user)
-                            record.added_to_group = False
-                            logger(
-                                f"Removed {record.netid} from "
-                                f"old group/team {old_group_name}"
-                            )
-
-        # Add users to their team
-        for record, lock in records:
-            with lock:
-                if (
-                    record.enrolled
-                    and record.github_accepted
-                    and record.group_repo_name
-                    and (not record.added_to_group)
-                ):
-                    if record.github_username is None:
                         logger(
                             f"{record.netid} accepted to GitHub, "
                             "but no username; ignoring"
                         )
-                        continue
+                    continue
+
+                if record.netid in old_groups:
+                    old_group_name = self.get_team_name(
+                        old_groups[record.netid]
+                    )
+                    team_slugs.add(old_group_name)
+                    usernames.add(record.github_username)
+                    to_remove.append(
+                        (
+                            record,
+                            lock,
+                            old_group_name,
+                            record.github_username,
+                        )
+                    )
+
+                if (
+                    record.github_accepted
+                    and record.group_repo_name
+                    and (
+                        (not record.added_to_group)
+                        or (record.netid in old_groups)
+                    )
+                ):
                     if debug:
                         logger(
                             f"DEBUG: Not adding {record.netid} to group team"
                         )
                         continue
-                    try:
-                        user = _github.get_user(record.github_username)
-                        team_to_add_to = _org.get_team_by_slug(
-                            record.group_repo_name
+                    team_slugs.add(record.group_repo_name)
+                    usernames.add(record.github_username)
+                    to_add.append(
+                        (
+                            record,
+                            lock,
+                            record.group_repo_name,
+                            record.github_username,
                         )
+                    )
+
+        teams = prefetch(_org.get_team_by_slug, team_slugs)
+        prefetch(_get_user, usernames)  # Populates the cache of users
+
+        def get_team(slug: str) -> github.Team.Team:
+            """Get a team in the organization, reusing previous lookups.
+
+            Args:
+                slug (str): The slug of the team
+
+            Returns:
+                github.Team.Team: The corresponding team
+            """
+            if slug not in teams:
+                teams[slug] = _org.get_team_by_slug(slug)
+            return teams[slug]
+
+        # Only list the members of each team once
+        team_members: dict[str, set[str]] = {}
+
+        def get_member_logins(slug: str) -> set[str]:
+            """Get the logins of a team's members, reusing previous lookups.
+
+            Args:
+                slug (str): The slug of the team
+
+            Returns:
+                set[str]: The logins of the team's members
+            """
+            if slug not in team_members:
+                team_members[slug] = {
+                    member["login"]
+                    for member in list_conditional(
+                        f"{get_team(slug).url}/members", keys=("login",)
+                    )
+                }
+            return team_members[slug]
+
+        # Remove users from old teams, only holding their locks to update
+        # their records
+        for record, lock, old_group_name, username in to_remove:
+            group_team = get_team(old_group_name)
+            user = _get_user(username)
+            if isinstance(
+                user,
+                github.AuthenticatedUser.AuthenticatedUser,
+            ):
+                logger(f"Avoiding removing {user.login} (yourself?)")
+                continue
+            else:
+                old_members = get_member_logins(old_group_name)
+                if user.login in old_members:
+                    group_team.remove_membership(user)
+                    old_members.discard(user.login)
+                    with lock:
+                        record.added_to_group = False
+                    logger(
+                        f"Removed {record.netid} from "
+                        f"old group/team {old_group_name}"
+                    )
+
+        # Add users to their team concurrently
+        def add_student(student: tuple[StudentRecord, Lock, str, str]) -> None:
+            """Add a student to their group's team.
+
+            Args:
+                student (tuple[StudentRecord, Lock, str, str]): The student's
+                  record and lock, as well as the names of their group's
+                  team and their GitHub user
+            """
+            record, lock, team_name, username = student
+            with lock:
+                if record.added_to_group:
+                    return  # Already added, and not removed above
+            try:
+                user = _get_user(username)
+                team_to_add_to = get_team(team_name)
+
+                if isinstance(
+                    user,
+                    github.AuthenticatedUser.AuthenticatedUser,
+                ):
+                    logger(f"Avoiding inviting {user.login} (yourself?)")
+                    return
+
+                if team_to_add_to is None:
+                    logger("Internal error: Couldn't find team to add to")
+                else:
+                    team_to_add_to.add_membership(user, role="member")
+                    with lock:
+                        record.added_to_group = True
+                    logger(f"{record.netid} added to group/team {team_name}")
+            except Exception:
+                logger(f"Error adding {record.netid} to group team")
 
-                        if isinstance(
-                            user,
-                            github.AuthenticatedUser.AuthenticatedUser,
-                        ):
-                            logger(
-                                f"Avoiding inviting {user.login} (yourself?)"
-                            )
-                            continue
-
-                        if team_to_add_to is None:
-                            logger(
-                                "Internal error: Couldn't find team to add to"
-                            )
-                        else:
-                            team_to_add_to.add_membership(user, role="member")
-                            record.added_to_group = True
-                            logger(
-                                f"{record.netid} added to group/team "
-                                f"{record.group_repo_name}"
-                            )
-                    except Exception:
-                        logger(f"Error adding {record.netid} to group team")
+        # Each addition looks up the user and team, then adds the membership
+        run_parallel(
+            add_student,
+            to_add,
+            num_workers=_plan_workers(3 * len(to_add), logger),
+        )
@@ -8,9 +8,10 @@ import github
 from threading import Lock
 from typing import Any, Callable, Self, Type
 
-from github_steps import _github, _org
+from github_steps import _get_user, _org, _plan_workers
 from flow.flow_steps import FlowPropagateStep, ValidConfigTypes
 from records.student_record import StudentRecord
+from utils.parallel import run_parallel
 
 # -----------------------------------------------------------------------------
 # AddToPersonalRepos
@@ -52,6 +53,9 @@ class AddToPersonalRepos(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
+        # Find the students to add while holding their locks, then make the
+        # (slow) API calls concurrently
+        to_add: list[tuple[StudentRecord, Lock, str, str]] = []
         for record, lock in records:
             with lock:
                 if (
@@ -71,23 +75,45 @@ class AddToPersonalRepos(FlowPropagateStep[StudentRecord]):
                             f"DEBUG: Not adding {record.netid} to personal repo"
                         )
                         continue
-                    try:
-                        repo = _org.get_repo(record.personal_repo_name)
-                        user = _github.get_user(record.github_username)
-
-                        # Only operate on NamedUsers, not AuthenticatedUsers
-                        if isinstance(
-                            user,
-                            github.AuthenticatedUser.AuthenticatedUser,
-                        ):
-                            logger(
-                                f"Avoiding inviting {user.login} (yourself?)"
-                            )
-                            continue
-                        repo.add_to_collaborators(
-                            collaborator=user, permission="push"
+                    to_add.append(
+                        (
+                            record,
+                            lock,
+                            record.personal_repo_name,
+                            record.github_username,
                         )
-                        record.added_to_personal = True
-                        logger(f"{record.netid} added to personal repo")
-                    except Exception:
-                        logger(f"Error adding {record.netid} to personal repo")
+                    )
+
+        def add_student(student: tuple[StudentRecord, Lock, str, str]) -> None:
+            """Add a student to their personal repository.
+
+            Args:
+                student (tuple[StudentRecord, Lock, str, str]): The student's
+                  record and lock, as well as the names of their repo and
+                  GitHub user
+            """
+            record, lock, repo_name, username = student
+            try:
+                repo = _org.get_repo(repo_name)
+                user = _get_user(username)
+
+                # Only operate on NamedUsers, not AuthenticatedUsers
+                if isinstance(
+                    user,
+                    github.AuthenticatedUser.AuthenticatedUser,
+                ):
+                    logger(f"Avoiding inviting {user.login} (yourself?)")
+                    return
+                repo.add_to_collaborators(collaborator=user, permission="push")
+                with lock:
+                    record.added_to_personal = True
+                logger(f"{record.netid} added to personal repo")
+            except Exception:
+                logger(f"Error adding {record.netid} to personal repo")
+
+        # Each addition looks up the repo and user, then adds the collaborator
+        run_parallel(
+            add_student,
+            to_add,
+            num_workers=_plan_workers(3 * len(to_add), logger),
+        )
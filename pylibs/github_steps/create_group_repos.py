@@ -4,14 +4,21 @@ Author: Aidan McNay
 Date: September 17th, 2024
 """
 
+from collections import defaultdict
 import github
 import os
 from threading import Lock
 from typing import Any, Callable, Self
 
-from github_steps import _org
+from github_steps import (
+    _drop_listings,
+    _get_repo_names,
+    _org,
+    _plan_workers,
+)
 from flow.flow_steps import FlowPropagateStep
 from records.student_record import StudentRecord
+from utils.parallel import run_parallel
 
 # -----------------------------------------------------------------------------
 # CreateGroupRepos
@@ -89,18 +96,18 @@ class CreateGroupRepos(FlowPropagateStep[StudentRecord]):
             raise Exception(
                 "Whoops - make sure you have a unique name for each repo!"
             )
+
+        # Split the format (and build the number's format spec) once, so
+        # names can be formed with a single join
+        self._name_parts: list[str] = self.configs.name_format.split("<num>")
+        self._num_format = f"0{self.configs.num_places}d"
+
         # Make sure the README exists
         if not os.path.isfile(self.configs.readme_path):
             raise Exception(
                 f"README file '{self.configs.readme_path}' doesn't exist"
             )
 
-        # Make sure that the staff team exists
-        try:
-            _org.get_team_by_slug(self.configs.staff_team)
-        except Exception:
-            raise Exception(f"No staff team '{self.configs.staff_team}'")
-
         # Make sure that the permissions are a valid option
         if self.configs.staff_permissions not in (
             "pull",
@@ -114,8 +121,31 @@ class CreateGroupRepos(FlowPropagateStep[StudentRecord]):
                 f"'{self.configs.staff_permissions}'"
             )
 
+        # Make sure that the staff team exists (checked last, as it requires
+        # a request to GitHub)
+        try:
+            _org.get_team_by_slug(self.configs.staff_team)
+        except Exception:
+            raise Exception(f"No staff team '{self.configs.staff_team}'")
+
+    def get_repo_name(self: Self, num: int) -> str:
+        """Get the name of the repo/team for a group number.
+
+        Args:
+            self (Self): The relevant propagate step
+            num (int): The group number
+
+        Returns:
+            str: The name of the group's repo/team
+        """
+        return format(num, self._num_format).join(self._name_parts)
+
     def create_repo(
-        self: Self, repo_name: str, student_names: str, readme_text: str
+        self: Self,
+        repo_name: str,
+        student_names: str,
+        readme_text: str,
+        staff_team: github.Team.Team,
     ) -> github.Repository.Repository:
         """Create a group repository.
 
@@ -125,6 +155,7 @@ class CreateGroupRepos(FlowPropagateStep[StudentRecord]):
             student_names (str): The name of the student who the repository is
               for
             readme_text (str): The text to have in the README file
+            staff_team (github.Team.Team): The staff team to add to the repo
 
         Returns:
             github.Repository.Repository: The new repository
@@ -132,21 +163,29 @@ class CreateGroupRepos(FlowPropagateStep[StudentRecord]):
         new_repo = _org.create_repo(
             name=repo_name, description=student_names, private=True
         )
-        initial_commit = new_repo.create_file(
-            path="README.md",
-            content=readme_text,
-            message=self.configs.readme_commit_msg,
-        )["commit"]
-
-        if self.configs.create_upstream:
-            new_repo.create_git_ref(
-                ref="refs/heads/upstream", sha=initial_commit.sha
+
+        def add_readme() -> None:
+            """Commit the README (and branch off upstream, if needed)."""
+            initial_commit = new_repo.create_file(
+                path="README.md",
+                content=readme_text,
+                message=self.configs.readme_commit_msg,
+            )["commit"]
+
+            if self.configs.create_upstream:
+                new_repo.create_git_ref(
+                    ref="refs/heads/upstream", sha=initial_commit.sha
+                )
+
+        def add_staff() -> None:
+            """Add all staff members to the repo, with their permissions."""
+            staff_team.update_team_repository(
+                new_repo, self.configs.staff_permissions
             )
 
-        # Add all staff members
-        staff_team = _org.get_team_by_slug(self.configs.staff_team)
-        staff_team.add_to_repos(new_repo)
-        staff_team.set_repo_permission(new_repo, self.configs.staff_permissions)
+        # The README and staff access don't depend on each other, so set
+        # them up concurrently
+        run_parallel(lambda setup: setup(), [add_readme, add_staff])
 
         return new_repo
 
@@ -170,63 +209,79 @@ class CreateGroupRepos(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        all_repo_names = [repo.name for repo in _org.get_repos()]
+        all_repo_names = _get_repo_names(get_metadata, set_metadata)
+        # Split the README template once, so each README is a single join
         with open(self.configs.readme_path, "r") as f:
-            readme_template = f.read()
+            readme_parts = f.read().split("<repo_name>")
+        staff_team = _org.get_team_by_slug(self.configs.staff_team)
 
         # Get the mapping of numbers to student names
-        num_students_mapping: dict[int, list[str]] = {}
+        num_students_mapping: defaultdict[int, list[str]] = defaultdict(list)
         for record, lock in records:
             with lock:
-                if record.group_num:
-                    name = f"{record.first_name} {record.last_name}"
-                    if record.group_num in num_students_mapping:
-                        num_students_mapping[record.group_num].append(name)
-                    else:
-                        num_students_mapping[record.group_num] = [name]
-
-        # Create all the necessary repos/teams
-        for num, names in num_students_mapping.items():
-            repo_name = self.configs.name_format.replace(
-                "<num>", str(num).zfill(self.configs.num_places)
-            )
-            readme_text = readme_template.replace("<repo_name>", repo_name)
-            repo_exists = False
-            if repo_name not in all_repo_names:
-                if debug:
-                    logger(f"DEBUG: Not creating group repo {repo_name}")
-                else:
-                    try:
-                        student_names = ", ".join(names)
-                        new_repo = self.create_repo(
-                            repo_name, student_names, readme_text
-                        )
-                        new_team = _org.create_team(
-                            name=repo_name,
-                            repo_names=[new_repo],
-                            privacy="secret",
-                            notification_setting="notifications_enabled",
-                            permission="push",
-                            maintainers=[],
-                        )
-                        # Remove yourself as the only existing member
-                        for member in new_team.get_members():
-                            new_team.remove_membership(member)
-                        logger(
-                            "Created group repo and associated "
-                            f"team: '{repo_name}'"
-                        )
-                        repo_exists = True
-                    except Exception:
-                        logger(
-                            f"Issue creating group repo/team: '{repo_name}'"
-                            " - repo not created"
-                        )
-            else:
-                repo_exists = True
-
-            if repo_exists:
-                for record, lock in records:
-                    with lock:
-                        if record.group_num and (record.group_num == num):
-                            record.group_repo_name = repo_name
+                group_num = record.group_num
+                name = f"{record.first_name} {record.last_name}"
+            if group_num:
+                num_students_mapping[group_num].append(name)
+
+        # Create all the necessary repos/teams concurrently (one group per
+        # task, so that no two tasks race on the same repo)
+        group_repo_names: dict[int, str] = {}
+        created_repo_names: list[str] = []
+
+        def create_group_repo(group: tuple[int, list[str]]) -> None:
+            """Create the repo and team for a group, if needed.
+
+            Args:
+                group (tuple[int, list[str]]): The group number, along with
+                  the names of the students in the group
+            """
+            num, names = group
+            repo_name = self.get_repo_name(num)
+            if repo_name.lower() in all_repo_names:
+                group_repo_names[num] = repo_name
+                return
+            if debug:
+                logger(f"DEBUG: Not creating group repo {repo_name}")
+                return
+            readme_text = repo_name.join(readme_parts)
+            try:
+                student_names = ", ".join(names)
+                new_repo = self.create_repo(
+                    repo_name, student_names, readme_text, staff_team
+                )
+                new_team = _org.create_team(
+                    name=repo_name,
+                    repo_names=[new_repo],
+                    privacy="secret",
+                    notification_setting="notifications_enabled",
+                    permission="push",
+                    maintainers=[],
+                )
+                # Remove yourself (and any other automatically-added
+                # members) from the team
+                run_parallel(new_team.remove_membership, new_team.get_members())
+                logger(f"Created group repo and associated team: '{repo_name}'")
+                group_repo_names[num] = repo_name
+                created_repo_names.append(repo_name)
+            except Exception as e:
+                logger(
+                    f"Issue creating group repo/team: '{repo_name}'"
+                    f" - repo not created ({e})"
+                )
+
+        # Each creation makes the repo, README, branch, staff permissions, and
+        # team, then lists and removes the team's automatic members
+        run_parallel(
+            create_group_repo,
+            num_students_mapping.items(),
+            num_workers=_plan_workers(7 * len(num_students_mapping), logger),
+        )
+        if created_repo_names:
+            _drop_listings(["org_repo_names"], set_metadata)
+
+        # Record the repos of all students in groups that have one
+        for record, lock in records:
+            with lock:
+                if record.group_num and (record.group_num in group_repo_names):
+                    record.group_repo_name = group_repo_names[record.group_num]
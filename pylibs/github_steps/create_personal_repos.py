@@ -4,13 +4,15 @@ Author: Aidan McNay
 Date: September 17th, 2024
 """
 
+import github
 import os
 from threading import Lock
 from typing import Any, Callable, Self
 
-from github_steps import _org
+from github_steps import _already_exists, _org, _plan_workers
 from flow.flow_steps import FlowPropagateStep
 from records.student_record import StudentRecord
+from utils.parallel import prefetch, run_parallel
 
 # -----------------------------------------------------------------------------
 # CreatePersonalRepos
@@ -86,12 +88,6 @@ class CreatePersonalRepos(FlowPropagateStep[StudentRecord]):
                 f"README file '{self.configs.readme_path}' doesn't exist"
             )
 
-        # Make sure that the staff team exists
-        try:
-            _org.get_team_by_slug(self.configs.staff_team)
-        except Exception:
-            raise Exception(f"No staff team '{self.configs.staff_team}'")
-
         # Make sure that the permissions are a valid option
         if self.configs.staff_permissions not in (
             "pull",
@@ -105,8 +101,19 @@ class CreatePersonalRepos(FlowPropagateStep[StudentRecord]):
                 f"'{self.configs.staff_permissions}'"
             )
 
+        # Make sure that the staff team exists (checked last, as it requires
+        # a request to GitHub)
+        try:
+            _org.get_team_by_slug(self.configs.staff_team)
+        except Exception:
+            raise Exception(f"No staff team '{self.configs.staff_team}'")
+
     def create_repo(
-        self: Self, repo_name: str, student_name: str, readme_text: str
+        self: Self,
+        repo_name: str,
+        student_name: str,
+        readme_text: str,
+        staff_team: github.Team.Team,
     ) -> None:
         """Create a personal repository.
 
@@ -116,25 +123,34 @@ class CreatePersonalRepos(FlowPropagateStep[StudentRecord]):
             student_name (str): The name of the student who the repository is
               for
             readme_text (str): The text to have in the README file
+            staff_team (github.Team.Team): The staff team to add to the repo
         """
         new_repo = _org.create_repo(
             name=repo_name, description=student_name, private=True
         )
-        initial_commit = new_repo.create_file(
-            path="README.md",
-            content=readme_text,
-            message=self.configs.readme_commit_msg,
-        )["commit"]
-
-        if self.configs.create_upstream:
-            new_repo.create_git_ref(
-                ref="refs/heads/upstream", sha=initial_commit.sha
+
+        def add_readme() -> None:
+            """Commit the README (and branch off upstream, if needed)."""
+            initial_commit = new_repo.create_file(
+                path="README.md",
+                content=readme_text,
+                message=self.configs.readme_commit_msg,
+            )["commit"]
+
+            if self.configs.create_upstream:
+                new_repo.create_git_ref(
+                    ref="refs/heads/upstream", sha=initial_commit.sha
+                )
+
+        def add_staff() -> None:
+            """Add all staff members to the repo, with their permissions."""
+            staff_team.update_team_repository(
+                new_repo, self.configs.staff_permissions
             )
 
-        # Add all staff members
-        staff_team = _org.get_team_by_slug(self.configs.staff_team)
-        staff_team.add_to_repos(new_repo)
-        staff_team.set_repo_permission(new_repo, self.configs.staff_permissions)
+        # The README and staff access don't depend on each other, so set
+        # them up concurrently
+        run_parallel(lambda setup: setup(), [add_readme, add_staff])
 
     def propagate_records(
         self: Self,
@@ -156,37 +172,88 @@ class CreatePersonalRepos(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        all_repo_names = [repo.name for repo in _org.get_repos()]
+        # Split the README template once, so each README is a single join
         with open(self.configs.readme_path, "r") as f:
-            readme_template = f.read()
+            readme_parts = f.read().split("<repo_name>")
+        staff_team = _org.get_team_by_slug(self.configs.staff_team)
 
+        # Get every student's repo name while holding their locks (checking
+        # all of them, so that deleted repos are recreated)
+        to_check: list[tuple[StudentRecord, Lock, str, str]] = []
         for record, lock in records:
             with lock:
                 repo_name = self.configs.name_format.replace(
                     "<netid>", record.netid
                 )
-                readme_text = readme_template.replace("<repo_name>", repo_name)
-                repo_exists = False
-                if repo_name not in all_repo_names:
-                    if debug:
-                        logger(f"DEBUG: Not creating personal repo {repo_name}")
-                    else:
-                        try:
-                            student_name = (
-                                f"{record.first_name} {record.last_name}"
-                            )
-                            self.create_repo(
-                                repo_name, student_name, readme_text
-                            )
-                            logger(f"Created personal repo: '{repo_name}'")
-                            repo_exists = True
-                        except Exception:
-                            logger(
-                                f"Issue creating personal repo: '{repo_name}'"
-                                " - repo not created"
-                            )
-                else:
-                    repo_exists = True
-
-                if repo_exists:
+                student_name = f"{record.first_name} {record.last_name}"
+                to_check.append((record, lock, repo_name, student_name))
+
+        def repo_exists(repo_name: str) -> bool:
+            """Check whether a repository exists in the organization.
+
+            Args:
+                repo_name (str): The name of the repository
+
+            Returns:
+                bool: Whether the repository exists
+            """
+            try:
+                _org.get_repo(repo_name)
+                return True
+            except github.UnknownObjectException:
+                return False
+
+        # Check for each repo directly (concurrently), rather than listing
+        # every repo in the organization
+        exists = prefetch(
+            repo_exists,
+            (student[2] for student in to_check),
+            num_workers=_plan_workers(len(to_check), logger),
+        )
+
+        to_create: list[tuple[StudentRecord, Lock, str, str]] = []
+        for record, lock, repo_name, student_name in to_check:
+            if repo_name not in exists:
+                logger(f"Issue checking for personal repo: '{repo_name}'")
+            elif exists[repo_name]:
+                with lock:
                     record.personal_repo_name = repo_name
+            elif debug:
+                logger(f"DEBUG: Not creating personal repo {repo_name}")
+            else:
+                to_create.append((record, lock, repo_name, student_name))
+
+        def create_student_repo(
+            student: tuple[StudentRecord, Lock, str, str],
+        ) -> None:
+            """Create a student's personal repository.
+
+            Args:
+                student (tuple[StudentRecord, Lock, str, str]): The student's
+                  record and lock, as well as the name of their repo and
+                  their full name
+            """
+            record, lock, repo_name, student_name = student
+            readme_text = repo_name.join(readme_parts)
+            try:
+                self.create_repo(
+                    repo_name, student_name, readme_text, staff_team
+                )
+                logger(f"Created personal repo: '{repo_name}'")
+            except Exception as e:
+                if not _already_exists(e, "name already exists"):
+                    logger(
+                        f"Issue creating personal repo: '{repo_name}'"
+                        f" - repo not created ({e})"
+                    )
+                    return
+                logger(f"Personal repo '{repo_name}' already exists")
+            with lock:
+                record.personal_repo_name = repo_name
+
+        # Each creation makes the repo, README, branch, and staff permissions
+        run_parallel(
+            create_student_repo,
+            to_create,
+            num_workers=_plan_workers(4 * len(to_create), logger),
+        )
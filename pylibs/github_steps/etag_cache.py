@@ -0,0 +1,163 @@
+"""Conditional listing of GitHub resources, persisted across flow runs.
+
+GitHub returns a 304 (with no body, and without counting against the rate
+limit) for a request whose ETag matches the current resource. We remember
+the ETag and contents of each listed page on disk, so that recurring runs of
+a flow only download pages that have changed.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+import os
+import pickle
+import re
+from threading import Lock
+from typing import Any, Optional
+
+from github_steps import _github, PER_PAGE
+
+# -----------------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------------
+# Maps page URLs to their ETag, items, and the URL of the next page
+
+CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "courseflow", "github_etags.pkl"
+)
+
+CacheEntry = tuple[str, list[dict[str, Any]], Optional[str]]
+
+_cache: Optional[dict[str, CacheEntry]] = None
+_cache_lock = Lock()
+
+NEXT_LINK_REGEX = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def _load_cache() -> dict[str, CacheEntry]:
+    """Get the cache, loading it from disk on first use.
+
+    Returns:
+        dict[str, CacheEntry]: The cache of listed pages
+    """
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, "rb") as f:
+                _cache = pickle.load(f)
+        except Exception:
+            _cache = {}
+    return _cache
+
+
+def _save_cache(cache: dict[str, CacheEntry]) -> None:
+    """Save the cache to disk, ignoring any errors.
+
+    Args:
+        cache (dict[str, CacheEntry]): The cache to save
+    """
+    tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError:
+        pass
+
+
+# -----------------------------------------------------------------------------
+# list_conditional
+# -----------------------------------------------------------------------------
+
+
+def _get_header(headers: dict[str, Any], name: str) -> Optional[str]:
+    """Get a response header, regardless of case.
+
+    Args:
+        headers (dict[str, Any]): The response headers
+        name (str): The (lowercase) name of the header
+
+    Returns:
+        Optional[str]: The value of the header, if present
+    """
+    for key, value in headers.items():
+        if key.lower() == name:
+            return str(value)
+    return None
+
+
+def list_conditional(
+    url: str, keys: Optional[tuple[str, ...]] = None
+) -> list[dict[str, Any]]:
+    """List all items of a paginated GitHub endpoint, using cached pages.
+
+    Each page is requested with the ETag from the last time it was listed;
+    unchanged pages are reused from the cache.
+
+    Args:
+        url (str): The URL (or path) of the endpoint to list
+        keys (Optional[tuple[str, ...]], optional): The keys of each item to
+          keep (and cache). Defaults to None, keeping the entire item
+
+    Returns:
+        list[dict[str, Any]]: The JSON items across all pages
+    """
+    global _cache
+    requester = _github.requester
+    with _cache_lock:
+        cache = dict(_load_cache())
+
+    items: list[dict[str, Any]] = []
+    page_url: Optional[str] = url
+    changed = False
+    while page_url is not None:
+        headers: dict[str, str] = {}
+        if page_url in cache:
+            headers["If-None-Match"] = cache[page_url][0]
+        # Later pages' URLs already include the page size
+        parameters = {"per_page": PER_PAGE} if page_url == url else None
+        response_headers, data = requester.requestJsonAndCheck(
+            "GET", page_url, parameters=parameters, headers=headers
+        )
+
+        # The ETag only covers the page's items, so the next page is always
+        # found from the response's Link header (sent even with a 304)
+        next_url = None
+        link = _get_header(response_headers, "link")
+        if link is not None:
+            match = NEXT_LINK_REGEX.search(link)
+            if match is not None:
+                next_url = match.group(1)
+
+        if data is None:  # 304 Not Modified
+            if page_url not in cache:
+                raise Exception(
+                    f"GitHub reported {page_url} as unmodified, but it "
+                    "isn't cached"
+                )
+            cached_etag, page_items, cached_next_url = cache[page_url]
+            if next_url != cached_next_url:
+                cache[page_url] = (cached_etag, page_items, next_url)
+                changed = True
+        else:
+            if keys is None:
+                page_items = list(data)
+            else:
+                page_items = [
+                    {key: item[key] for key in keys if key in item}
+                    for item in data
+                ]
+            etag = _get_header(response_headers, "etag")
+            if etag is not None:
+                cache[page_url] = (etag, page_items, next_url)
+                changed = True
+
+        items.extend(page_items)
+        page_url = next_url
+
+    if changed:
+        with _cache_lock:
+            _cache = {**_load_cache(), **cache}
+            _save_cache(_cache)
+    return items
@@ -9,9 +9,16 @@ import github
 from threading import Lock
 from typing import Any, Callable, Self
 
-from github_steps import _github, _org
+from github_steps import (
+    _already_exists,
+    _drop_listings,
+    _get_user,
+    _org,
+    _plan_workers,
+)
 from flow.flow_steps import FlowPropagateStep
 from records.student_record import StudentRecord
+from utils.parallel import run_parallel
 
 # -----------------------------------------------------------------------------
 # InviteStudents
@@ -65,7 +72,14 @@ class InviteStudents(FlowPropagateStep[StudentRecord]):
         """
         student_team = _org.get_team_by_slug(self.configs.student_team)
 
+        # Find the students to invite while holding their locks, then make
+        # the (slow) API calls concurrently
+        to_invite: list[tuple[StudentRecord, Lock, str]] = []
         for record, lock in records:
+            # Most students have already been invited; skip them without
+            # taking their lock (re-checking below once we hold it)
+            if record.sent_invite or not record.enrolled:
+                continue
             with lock:
                 if (
                     record.enrolled
@@ -79,31 +93,52 @@ class InviteStudents(FlowPropagateStep[StudentRecord]):
                             "to the GitHub org."
                         )
                     else:
-                        try:
-                            user = _github.get_user(record.github_username)
-
-                            # Only operate on NamedUsers, not AuthenticatedUsers
-                            if isinstance(
-                                user,
-                                github.AuthenticatedUser.AuthenticatedUser,
-                            ):
-                                logger(
-                                    f"Avoiding inviting {user.login} "
-                                    "(yourself?)"
-                                )
-                                continue
-
-                            _org.invite_user(
-                                user=user,
-                                role="direct_member",
-                                teams=[student_team],
-                            )
-                            record.sent_invite = True
-                            record.invite_date = datetime.now()
-                            record.github_accepted = False
-                            logger(f"Invited {record.netid} to the GitHub org")
-                        except Exception:
-                            logger(
-                                f"Issue inviting {record.netid} "
-                                "to the GitHub org"
-                            )
+                        to_invite.append((record, lock, record.github_username))
+
+        def invite_student(student: tuple[StudentRecord, Lock, str]) -> None:
+            """Invite a student to the GitHub organization.
+
+            Args:
+                student (tuple[StudentRecord, Lock, str]): The student's
+                  record and lock, as well as their GitHub username
+            """
+            record, lock, username = student
+            try:
+                user = _get_user(username)
+
+                # Only operate on NamedUsers, not AuthenticatedUsers
+                if isinstance(
+                    user,
+                    github.AuthenticatedUser.AuthenticatedUser,
+                ):
+                    logger(f"Avoiding inviting {user.login} (yourself?)")
+                    return
+
+                _org.invite_user(
+                    user=user,
+                    role="direct_member",
+                    teams=[student_team],
+                )
+                logger(f"Invited {record.netid} to the GitHub org")
+            except Exception as e:
+                if not _already_exists(
+                    e, "already a part of this organization"
+                ):
+                    logger(
+                        f"Issue inviting {record.netid} to the GitHub org ({e})"
+                    )
+                    return
+                logger(f"{record.netid} was already invited to the GitHub org")
+            with lock:
+                record.sent_invite = True
+                record.invite_date = datetime.now()
+                record.github_accepted = False
+
+        # Each invitation looks up the user, then sends the invite
+        run_parallel(
+            invite_student,
+            to_invite,
+            num_workers=_plan_workers(2 * len(to_invite), logger),
+        )
+        if to_invite:
+            _drop_listings(["org_invitation_ids"], set_metadata)
@@ -7,7 +7,7 @@ Date: September 17th, 2024
 from threading import Lock
 from typing import Any, Callable, Self
 
-from github_steps import _org
+from github_steps import _get_member_logins, _get_team_logins, _org
 from flow.flow_steps import FlowUpdateStep
 from records.student_record import StudentRecord
 
@@ -40,21 +40,28 @@ class MarkAccepted(FlowUpdateStep[StudentRecord]):
         except Exception:
             raise Exception(f"No staff team '{self.configs.staff_team}'")
 
-    def list_students(self: Self) -> list[str]:
+    def list_students(
+        self: Self,
+        get_metadata: Callable[[str], Any],
+        set_metadata: Callable[[str, Any], None],
+    ) -> frozenset[str]:
         """List the student users who have joined the organization.
 
         Args:
             self (Self): The relevant update step
+            get_metadata (Callable[[str], Any]): A function to retrieve
+              global metadata previously set in the flow
+            set_metadata (Callable[[str, Any], None]): A function to set
+              global metadata within the flow
 
         Returns:
-            list[str]: The students who have joined the GitHub org
+            frozenset[str]: The students who have joined the GitHub org
         """
-        staff_users = _org.get_team_by_slug(
-            self.configs.staff_team
-        ).get_members()
-        return [
-            user.login for user in _org.get_members() if user not in staff_users
-        ]
+        # List the staff once, rather than for each member
+        staff_logins = _get_team_logins(
+            self.configs.staff_team, get_metadata, set_metadata
+        )
+        return _get_member_logins(get_metadata, set_metadata) - staff_logins
 
     def update_records(
         self: Self,
@@ -76,8 +83,18 @@ class MarkAccepted(FlowUpdateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        lower_usernames = [name.lower() for name in self.list_students()]
-        for record, lock in records:
+        lower_usernames = frozenset(
+            name.lower()
+            for name in self.list_students(get_metadata, set_metadata)
+        )
+        # Skip students who have already accepted without taking their
+        # locks (re-checking below once we hold them)
+        candidates = [
+            (record, lock)
+            for record, lock in records
+            if record.github_accepted is not True
+        ]
+        for record, lock in candidates:
             with lock:
                 if record.github_accepted is not True:
                     if (
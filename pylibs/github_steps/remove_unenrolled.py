@@ -8,9 +8,38 @@ import github
 from threading import Lock
 from typing import Any, Callable, Self
 
-from github_steps import _github, _org
+from github_steps import (
+    _cancel_invitation,
+    _drop_listings,
+    _get_collaborator_logins,
+    _get_invitation_ids,
+    _get_member_logins,
+    _get_team_logins,
+    _get_user,
+    _org,
+    _plan_workers,
+    _rate_limited_call,
+)
 from flow.flow_steps import FlowPropagateStep
 from records.student_record import StudentRecord
+from utils.parallel import run_parallel
+
+# -----------------------------------------------------------------------------
+# lower_logins
+# -----------------------------------------------------------------------------
+
+
+def lower_logins(logins: frozenset[str]) -> frozenset[str]:
+    """Get the lowercase versions of GitHub logins.
+
+    Args:
+        logins (frozenset[str]): The logins to convert
+
+    Returns:
+        frozenset[str]: The lowercase logins
+    """
+    return frozenset(login.lower() for login in logins)
+
 
 # -----------------------------------------------------------------------------
 # RemoveUnenrolled
@@ -41,19 +70,19 @@ class RemoveUnenrolled(FlowPropagateStep[StudentRecord]):
         """
         return
 
-    def is_staff(self: Self, user: github.NamedUser.NamedUser) -> bool:
+    def is_staff(self: Self, login: str, staff_logins: frozenset[str]) -> bool:
         """Return whether the user is a staff member.
 
         Args:
             self (Self): The relevant propagate step
-            user (github.NamedUser.NamedUser): The user to check
+            login (str): The login of the user to check
+            staff_logins (frozenset[str]): The logins of the staff team's
+              members
 
         Returns:
             bool: Whether the user is a staff member
         """
-        return (
-            user in _org.get_team_by_slug(self.configs.staff_team).get_members()
-        )
+        return login in staff_logins
 
     def propagate_records(
         self: Self,
@@ -75,10 +104,26 @@ class RemoveUnenrolled(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        members = _org.get_members()
-        outside_collaborators = _org.get_outside_collaborators()
-        invitations = _org.invitations()
+        # List the staff once, rather than for each student
+        staff_logins = lower_logins(
+            _get_team_logins(
+                self.configs.staff_team, get_metadata, set_metadata
+            )
+        )
+        # Get the logins of all members and outside collaborators, as well as
+        # all pending invitations, once (reusing this iteration's listings),
+        # rather than re-paginating for each student
+        member_logins = lower_logins(
+            _get_member_logins(get_metadata, set_metadata)
+        )
+        collaborator_logins = lower_logins(
+            _get_collaborator_logins(get_metadata, set_metadata)
+        )
+        invitation_ids = _get_invitation_ids(get_metadata, set_metadata)
 
+        # Snapshot the students to remove while holding their locks, then
+        # make the (slow) API calls concurrently without them
+        to_remove: list[tuple[StudentRecord, Lock, str, str]] = []
         for record, lock in records:
             with lock:
                 if (
@@ -93,46 +138,86 @@ class RemoveUnenrolled(FlowPropagateStep[StudentRecord]):
                             "from the GitHub org"
                         )
                         continue
-                    # Remove the student, including membership, outside
-                    # collaborators, and invitations
-                    try:
-                        user = _github.get_user(record.github_username)
-
-                        # Only operate on NamedUsers, not AuthenticatedUsers
-                        if isinstance(
-                            user,
-                            github.AuthenticatedUser.AuthenticatedUser,
-                        ):
-                            logger(f"Avoiding removing {user.login} (yourself)")
-                            continue
-
-                        if self.is_staff(user):
-                            logger(
-                                f"Avioding removing '{record.netid}' from "
-                                "GitHub (staff member)"
-                            )
-                            continue
-                        removed = False
-                        if user in members:
-                            _org.remove_from_members(user)
-                            removed = True
-                        if user in outside_collaborators:
-                            _org.remove_outside_collaborator(user)
-                            removed = True
-                        if user in list(invitations):
-                            _org.cancel_invitation(user)
-                            removed = True
-                        record.sent_invite = False
-                        record.github_accepted = None
-                        record.added_to_personal = False
-                        record.added_to_group = False
-                        if removed:
-                            logger(f"Removed {record.netid} from GitHub")
-                        else:
-                            # Assume they have already been removed
-                            pass
-                    except Exception:
-                        logger(
-                            f"Issue removing {record.netid} from GitHub"
-                            " - will try again later"
+                    to_remove.append(
+                        (record, lock, record.netid, record.github_username)
+                    )
+
+        def remove_student(
+            student: tuple[StudentRecord, Lock, str, str],
+        ) -> None:
+            """Remove a student from the GitHub organization.
+
+            This includes their membership, outside collaborations, and
+            invitations.
+
+            Args:
+                student (tuple[StudentRecord, Lock, str, str]): The
+                  student's record and lock, as well as their NetID and
+                  GitHub username
+            """
+            record, lock, netid, username = student
+            try:
+                # Check the user against our listings before looking them up
+                # (GitHub logins are case-insensitive)
+                login = username.lower()
+                if self.is_staff(login, staff_logins):
+                    logger(
+                        f"Avioding removing '{netid}' from "
+                        "GitHub (staff member)"
+                    )
+                    return
+                removed = False
+                if login in member_logins or login in collaborator_logins:
+                    user = _get_user(username)
+
+                    # Only operate on NamedUsers, not AuthenticatedUsers
+                    if isinstance(
+                        user,
+                        github.AuthenticatedUser.AuthenticatedUser,
+                    ):
+                        logger(f"Avoiding removing {user.login} (yourself)")
+                        return
+
+                    if login in member_logins:
+                        _rate_limited_call(_org.remove_from_members, user)
+                        removed = True
+                    if login in collaborator_logins:
+                        _rate_limited_call(
+                            _org.remove_outside_collaborator, user
                         )
+                        removed = True
+                if login in invitation_ids:
+                    _rate_limited_call(
+                        _cancel_invitation, invitation_ids[login]
+                    )
+                    removed = True
+                with lock:
+                    record.sent_invite = False
+                    record.github_accepted = None
+                    record.added_to_personal = False
+                    record.added_to_group = False
+                if removed:
+                    logger(f"Removed {netid} from GitHub")
+                else:
+                    # Assume they have already been removed
+                    pass
+            except Exception:
+                logger(
+                    f"Issue removing {netid} from GitHub"
+                    " - will try again later"
+                )
+
+        run_parallel(
+            remove_student,
+            to_remove,
+            num_workers=_plan_workers(4 * len(to_remove), logger),
+        )
+        if to_remove:
+            _drop_listings(
+                [
+                    "org_member_logins",
+                    "org_collaborator_logins",
+                    "org_invitation_ids",
+                ],
+                set_metadata,
+            )
@@ -9,8 +9,9 @@ from threading import Lock
 from typing import Any, Callable, Literal, Self, Type, TypeVar
 
 from flow.flow_steps import FlowPropagateStep
-from github_steps import _org
+from github_steps import _org, _plan_workers, _rate_limited_call
 from records.tag_record import TagRecords
+from utils.parallel import run_parallel
 
 # -----------------------------------------------------------------------------
 # get_tagger
@@ -109,47 +110,75 @@ def get_tagger(
             """
             if not self.should_tag():
                 return
+            tag_name = self.configs.tag_name
+            lab_to_tag = self.lab_to_tag
+            type_to_tag = self.type_to_tag
+
+            # Find the repos to tag while holding their locks, then make the
+            # (slow) API calls concurrently
+            to_tag: list[tuple[RecordType, Lock, str]] = []
             for record, lock in records:
                 with lock:
-                    tag_record = getattr(record, self.lab_to_tag)
+                    tag_record = getattr(record, lab_to_tag)
                     if (not tag_record.tagged()) and (
-                        record.repo_type == self.type_to_tag
+                        record.repo_type == type_to_tag
                     ):
                         if debug:
                             logger(
                                 f"DEBUG: Avoiding tagging {record.repo_name}"
                             )
                         else:
-                            try:
-                                # Need to tag the repo
-                                repo = _org.get_repo(record.repo_name)
-                                tag_name = self.configs.tag_name
-
-                                # Get the current hash
-                                curr_branch = repo.get_branch("main")
-
-                                # Create the tag
-                                tag = repo.create_git_tag(
-                                    tag=tag_name,
-                                    message=tag_msg,
-                                    object=curr_branch.commit.sha,
-                                    type="commit",
-                                )
-
-                                # Create a reference to the tag
-                                repo.create_git_ref(
-                                    "refs/tags/{}".format(tag.tag), tag.sha
-                                )
-
-                                # Update the record
-                                tag_record.name = tag_name
-                                tag_record.time = datetime.now()
-                                tag_record.ref_sha = tag.sha
-                                tag_record.commit_sha = curr_branch.commit.sha
-                                logger(
-                                    f"Tagged {record.repo_name} with {tag_name}"
-                                )
-                            except Exception:
-                                logger(f"Issue tagging {record.repo_name}")
+                            to_tag.append((record, lock, record.repo_name))
+
+            def tag_repo(repo_info: tuple[RecordType, Lock, str]) -> None:
+                """Tag a repo, and update its record.
+
+                Args:
+                    repo_info (tuple[RecordType, Lock, str]): The repo's
+                      record and lock, as well as the repo's name
+                """
+                record, lock, repo_name = repo_info
+                try:
+                    # Need to tag the repo
+                    repo = _org.get_repo(repo_name)
+
+                    # Get the current hash (from the branch's reference,
+                    # which is much smaller than the full branch)
+                    commit_sha = repo.get_git_ref("heads/main").object.sha
+
+                    # Create the tag
+                    tag = _rate_limited_call(
+                        repo.create_git_tag,
+                        tag=tag_name,
+                        message=tag_msg,
+                        object=commit_sha,
+                        type="commit",
+                    )
+
+                    # Create a reference to the tag
+                    _rate_limited_call(
+                        repo.create_git_ref,
+                        "refs/tags/{}".format(tag.tag),
+                        tag.sha,
+                    )
+
+                    # Update the record
+                    with lock:
+                        tag_record = getattr(record, lab_to_tag)
+                        tag_record.name = tag_name
+                        tag_record.time = datetime.now()
+                        tag_record.ref_sha = tag.sha
+                        tag_record.commit_sha = commit_sha
+                    logger(f"Tagged {repo_name} with {tag_name}")
+                except Exception:
+                    logger(f"Issue tagging {repo_name}")
+
+            # Each tag looks up the repo and reference, then creates the tag
+            # and its reference
+            run_parallel(
+                tag_repo,
+                to_tag,
+                num_workers=_plan_workers(4 * len(to_tag), logger),
+            )
 
     return RepoTagger
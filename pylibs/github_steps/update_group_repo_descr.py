@@ -4,13 +4,21 @@ Author: Aidan McNay
 Date: January 7th, 2025
 """
 
+from itertools import groupby
+from operator import itemgetter
 import re
 from threading import Lock
 from typing import Any, Callable, Self, Type
 
-from github_steps import _org
+from github_steps import (
+    _list_repo_descrs,
+    _org,
+    _plan_workers,
+    _rate_limited_call,
+)
 from flow.flow_steps import FlowPropagateStep, ValidConfigTypes
 from records.student_record import StudentRecord
+from utils.parallel import run_parallel
 
 # -----------------------------------------------------------------------------
 # AddToGroupRepos
@@ -37,9 +45,9 @@ class UpdateGroupRepoDescr(FlowPropagateStep[StudentRecord]):
 
     def validate(self: Self) -> None:
         """Validate the configurations for the step."""
-        # Make sure that we can parse the regex
-        re.compile(r"{}".format(self.configs.repo_regex))
-        return
+        # Make sure that we can parse the regex, keeping the compiled
+        # pattern to match repo names against
+        self._repo_re = re.compile(self.configs.repo_regex)
 
     def should_change_descr(self: Self, repo_name: str) -> bool:
         """Determine whether to modify the repo's description.
@@ -50,10 +58,7 @@ class UpdateGroupRepoDescr(FlowPropagateStep[StudentRecord]):
         Returns:
             bool: Whether to modify the description
         """
-        return (
-            re.match(r"{}".format(self.configs.repo_regex), repo_name)
-            is not None
-        )
+        return self._repo_re.match(repo_name) is not None
 
     def propagate_records(
         self: Self,
@@ -78,10 +83,8 @@ class UpdateGroupRepoDescr(FlowPropagateStep[StudentRecord]):
               mode, no external state should be modified, and we are free to
               inject dummy information. Defaults to False.
         """
-        # Get a mapping of repo names to students who have access
-        repo_name_mapping: dict[str, list[str]] = {}
-
         # Get the students who should be in each repo
+        eligible: list[tuple[str, str]] = []
         for record, lock in records:
             with lock:
                 if (
@@ -89,36 +92,60 @@ class UpdateGroupRepoDescr(FlowPropagateStep[StudentRecord]):
                     and record.group_repo_name
                     and record.added_to_group
                 ):
-                    if record.group_repo_name in repo_name_mapping:
-                        repo_name_mapping[record.group_repo_name].append(
-                            f"{record.first_name} {record.last_name} "
-                            f"({record.netid})"
-                        )
-                    else:
-                        repo_name_mapping[record.group_repo_name] = [
-                            f"{record.first_name} {record.last_name} "
-                            f"({record.netid})"
-                        ]
-
-        # Update repo descriptions as needed:
-        for repo in _org.get_repos():
-            if self.should_change_descr(repo.name):
-                if repo.name in repo_name_mapping:
-                    repo_descr = ", ".join(repo_name_mapping[repo.name])
+                    full_name = (
+                        f"{record.first_name} {record.last_name} "
+                        f"({record.netid})"
+                    )
+                    eligible.append((record.group_repo_name, full_name))
+
+        # Get a mapping of repo names to students who have access. The sort
+        # is stable, so students stay in the order of their records
+        repo_name_mapping = {
+            repo_name: [full_name for _, full_name in group]
+            for repo_name, group in groupby(
+                sorted(eligible, key=itemgetter(0)), key=itemgetter(0)
+            )
+        }
+
+        # List the current descriptions (conditionally, so unchanged pages
+        # are free), and only look up the repos that need updating
+        to_update: list[tuple[str, str]] = []
+        for repo_name, curr_descr in _list_repo_descrs().items():
+            if self.should_change_descr(repo_name):
+                if repo_name in repo_name_mapping:
+                    repo_descr = ", ".join(repo_name_mapping[repo_name])
                 else:
                     repo_descr = "No current membership"
-                if repo_descr != repo.description:
+                if repo_descr != curr_descr:
                     if debug:
                         logger(
                             "DEBUG: Avoiding updating description of "
-                            f"'{repo.name}'"
+                            f"'{repo_name}'"
                         )
                     else:
-                        try:
-                            repo.edit(description=repo_descr)
-                            logger(
-                                f"Updated description of '{repo.name}' to "
-                                f"'{repo_descr}'"
-                            )
-                        except Exception:
-                            logger(f"Error updating description of {repo.name}")
+                        to_update.append((repo_name, repo_descr))
+
+        def update_descr(update: tuple[str, str]) -> None:
+            """Update the description of a repo.
+
+            Args:
+                update (tuple[str, str]): The name of the repo and its new
+                  description
+            """
+            repo_name, repo_descr = update
+            try:
+                _rate_limited_call(
+                    _org.get_repo(repo_name).edit, description=repo_descr
+                )
+                logger(
+                    f"Updated description of '{repo_name}' to '{repo_descr}'"
+                )
+            except Exception:
+                logger(f"Error updating description of {repo_name}")
+
+        # Each update looks up the repo, then edits it
+        run_parallel(
+            update_descr,
+            to_update,
+            num_workers=_plan_workers(2 * len(to_update), logger),
+        )
@@ -9,12 +9,83 @@ import gspread
 import os
 from typing import cast
 
+from utils.api_call import retry_call
+from utils.lazy import Lazy
+from utils.ttl_cache import ttl_cache
+
 # Initialize our main service account object
 #  - For documentation generation, use a dummy object, and pretend it's
 #    the correct type for linting
 if "AUTODOC_GEN" in os.environ:
     _sheets = cast(gspread.client.Client, object())
 else:
-    _sheets = gspread.auth.service_account(
-        filename=os.environ["GOOGLE_API_JSON"]
+    # The credentials are only read on first use, so that importing a step
+    # doesn't require them
+    _sheets = cast(
+        gspread.client.Client,
+        Lazy(
+            lambda: gspread.auth.service_account(
+                filename=os.environ["GOOGLE_API_JSON"]
+            )
+        ),
     )
+
+# -----------------------------------------------------------------------------
+# Cached handles
+# -----------------------------------------------------------------------------
+# Opening a spreadsheet or worksheet requests its metadata, so handles are
+# reused for a short time (ex. between getting and setting records)
+
+# How long (in seconds) a handle is reused for
+HANDLE_TTL = 300
+
+
+@ttl_cache(HANDLE_TTL)
+def _open_sheet(sheet_id: str) -> gspread.spreadsheet.Spreadsheet:
+    """Open a spreadsheet, reusing recently opened handles.
+
+    Args:
+        sheet_id (str): The ID of the spreadsheet
+
+    Returns:
+        gspread.spreadsheet.Spreadsheet: The opened spreadsheet
+    """
+    return retry_call(_sheets.open_by_key, sheet_id)
+
+
+@ttl_cache(HANDLE_TTL)
+def _list_worksheets(sheet_id: str) -> dict[str, gspread.worksheet.Worksheet]:
+    """List the worksheets of a spreadsheet, reusing recent listings.
+
+    This allows storers for different tabs of the same spreadsheet to share
+    one listing.
+
+    Args:
+        sheet_id (str): The ID of the spreadsheet
+
+    Returns:
+        dict[str, gspread.worksheet.Worksheet]: A mapping of worksheet titles
+          to the worksheets
+    """
+    sheet = _open_sheet(sheet_id)
+    return {
+        worksheet.title: worksheet for worksheet in retry_call(sheet.worksheets)
+    }
+
+
+@ttl_cache(HANDLE_TTL)
+def _open_worksheet(sheet_id: str, tab: str) -> gspread.worksheet.Worksheet:
+    """Open a worksheet, creating it if needed and reusing recent handles.
+
+    Args:
+        sheet_id (str): The ID of the spreadsheet
+        tab (str): The title of the worksheet
+
+    Returns:
+        gspread.worksheet.Worksheet: The opened worksheet
+    """
+    worksheets = _list_worksheets(sheet_id)
+    if tab in worksheets:
+        return worksheets[tab]
+    sheet = _open_sheet(sheet_id)
+    return retry_call(sheet.add_worksheet, title=tab, rows=1, cols=1)
@@ -7,11 +7,10 @@ Date: September 19th, 2024
 from typing import Any, Callable, get_args, Self, TypeVar
 
 from flow.flow_steps import FlowRecordStep
-from google_steps import _sheets
+from google_steps import _open_sheet
 from google_steps.spreadsheet_storer import SpreadsheetStorer
 from records.student_record import StudentRecord
 from records.tag_record import TagRecords
-from utils.api_call import retry_call
 
 # -----------------------------------------------------------------------------
 # GetTagRecords
@@ -42,7 +41,7 @@ class GetTagRecords(FlowRecordStep[RecordType]):
         """
         # Make sure we can connect to the spreadsheet
         try:
-            retry_call(_sheets.open_by_key, self.configs.sheet_id)
+            _open_sheet(self.configs.sheet_id)
         except Exception:
             raise Exception(
                 "Couldn't access spreadsheet - make sure it is "
@@ -70,7 +69,7 @@ class GetTagRecords(FlowRecordStep[RecordType]):
         Returns:
             list[RecordType]: The possibly augmented list of records
         """
-        curr_repos = [record.repo_name for record in curr_records]
+        curr_repos = {record.repo_name for record in curr_records}
         sheet_storer = SpreadsheetStorer[StudentRecord](
             {"sheet_id": self.configs.sheet_id, "tab": self.configs.tab}
         )
@@ -92,7 +91,7 @@ class GetTagRecords(FlowRecordStep[RecordType]):
                         repo_type="personal",
                     )
                 )
-                curr_repos.append(record.personal_repo_name)
+                curr_repos.add(record.personal_repo_name)
                 new_repo_count += 1
 
             # Add group repos
@@ -104,7 +103,7 @@ class GetTagRecords(FlowRecordStep[RecordType]):
                         repo_name=record.group_repo_name, repo_type="group"
                     )
                 )
-                curr_repos.append(record.group_repo_name)
+                curr_repos.add(record.group_repo_name)
                 new_repo_count += 1
 
         if new_repo_count > 0:
@@ -5,10 +5,13 @@ Date: September 16th, 2024
 """
 
 from datetime import datetime
+import functools
+import gspread
+from gspread.utils import absolute_range_name
 import hashlib
-from typing import Callable, get_args, TypeVar
+from typing import Any, Callable, cast, get_args, Optional, TypeVar
 
-from google_steps import _sheets
+from google_steps import _open_sheet, _open_worksheet
 from flow.global_lock import GLock
 from flow.record_storer import RecordStorer
 from records.spreadsheet_record import SpreadsheetRecord
@@ -39,7 +42,7 @@ class SpreadsheetStorer(RecordStorer[RecordType]):
         """Validate the configurations for the spreadsheet storer."""
         # Make sure we can connect to the spreadsheet
         try:
-            retry_call(_sheets.open_by_key, self.configs.sheet_id)
+            _open_sheet(self.configs.sheet_id)
         except Exception:
             raise Exception(
                 "Couldn't access spreadsheet - make sure it is "
@@ -54,9 +57,53 @@ class SpreadsheetStorer(RecordStorer[RecordType]):
         accessible as plaintext on the shared filesystem, and we
         probably don't want others to know the ID of our course
         database spreadsheet if possible?
+
+        The hash only needs to obscure the ID (not be cryptographically
+        strong), so we use the faster BLAKE2b, and only compute it once.
+        """
+        return self._lock_digest
+
+    @functools.cached_property
+    def _record_type(
+        self: "SpreadsheetStorer[RecordType]",
+    ) -> type[RecordType]:
+        """Get the type of records being stored, determining it once.
+
+        This is only available after initialization, as Python sets
+        __orig_class__ once the instance is created.
+
+        Returns:
+            type[RecordType]: The record type
         """
-        hasher = hashlib.sha256()
+        # Hacky way to get the generic data type
+        return cast(
+            type[RecordType],
+            get_args(self.__orig_class__)[0],  # type: ignore
+        )
+
+    @functools.cached_property
+    def _record_headers(self: "SpreadsheetStorer[RecordType]") -> list[str]:
+        """Get the headers of the records being stored.
+
+        Record types define their headers as a class attribute (in place of
+        the abstract property), so they're read from the type directly.
+
+        Returns:
+            list[str]: The headers of the record type
+        """
+        return cast(list[str], self._record_type.headers)
+
+    @functools.cached_property
+    def _lock_digest(self: "SpreadsheetStorer[RecordType]") -> str:
+        """Hash the spreadsheet ID and tab for the global lock's ID.
+
+        Returns:
+            str: The hexadecimal digest
+        """
+        hasher = hashlib.blake2b(digest_size=16)
         hasher.update(str.encode(self.configs.sheet_id))
+        # Separate the two, so that different splits don't collide
+        hasher.update(b"\x00")
         hasher.update(str.encode(self.configs.tab))
         return hasher.hexdigest()
 
@@ -77,28 +124,68 @@ class SpreadsheetStorer(RecordStorer[RecordType]):
         """
         if debug:
             logger("Ignoring debug for SpreadsheetStorer")
+
         logger("Accessing spreadsheet...")
         with GLock(self.lock_id(), "r") as _:
-            sheet = retry_call(_sheets.open_by_key, self.configs.sheet_id)
+            sheet = _open_sheet(self.configs.sheet_id)
             logger(f"Accessed spreadsheet '{sheet.title}'")
 
-            if self.configs.tab in [
-                worksheet.title for worksheet in retry_call(sheet.worksheets)
-            ]:
-                logger(f"Found worksheet '{self.configs.tab}'")
-                worksheet = retry_call(sheet.worksheet, self.configs.tab)
-            else:
-                logger(f"Creating worksheet '{self.configs.tab}'")
-                worksheet = retry_call(
-                    sheet.add_worksheet, title=self.configs.tab, rows=1, cols=1
-                )
-
             # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
             # Get the records from the worksheet
             # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-            data = retry_call(worksheet.get_all_values)
+            def read_tab() -> Optional[list[list[str]]]:
+                """Read the tab's values, without looking up the worksheet.
+
+                Returns:
+                    Optional[list[list[str]]]: The rows of the tab, or None
+                      if the tab doesn't exist
+                """
+                try:
+                    return cast(
+                        list[list[str]],
+                        sheet.values_get(
+                            absolute_range_name(self.configs.tab)
+                        ).get("values", []),
+                    )
+                except gspread.exceptions.APIError as e:
+                    if e.code == 400 and "Unable to parse range" in str(e):
+                        return None
+                    raise
+
+            # Request every column, as records are read by header (which may
+            # not be the leading columns); trailing empty cells are omitted
+            # from each row. Transient errors are retried, but a missing tab
+            # isn't
+            tab_data = retry_call(read_tab)
+            if tab_data is None:
+                # Fall back to the worksheet, which creates it if missing
+                worksheet = _open_worksheet(
+                    self.configs.sheet_id, self.configs.tab
+                )
+                data = retry_call(worksheet.get)
+            else:
+                data = tab_data
+
+        records = self.parse_values(data, logger)
+        logger(f"Found {len(records)} records!")
+        return records
+
+    def parse_values(
+        self: "SpreadsheetStorer[RecordType]",
+        data: list[list[str]],
+        logger: Callable[[str], None],
+    ) -> list[RecordType]:
+        """Parse records from the values of a worksheet.
 
+        Args:
+            data (list[list[str]]): The rows of the worksheet
+            logger (Callable[[str], None]): A logger for recording notable
+              events
+
+        Returns:
+            list[RecordType]: The parsed records
+        """
         try:
             last_updated = data[0][0]
             if last_updated != "Last Updated:":
@@ -111,20 +198,20 @@ class SpreadsheetStorer(RecordStorer[RecordType]):
             )
             return []
 
-        records = []
+        record_type = self._record_type
 
-        # Hacky way to get the generic data type
-        record_type = get_args(self.__orig_class__)[0]  # type: ignore
+        records: list[RecordType] = []
+        header_tuple = tuple(headers)
+        padding = [""] * len(header_tuple)
 
         for row in data[2:]:
             try:
-                header_data_mapping = {
-                    header: row[idx] for idx, header in enumerate(headers)
-                }
-                records.append(record_type.from_strings(header_data_mapping))
+                # Pad rows with trailing empty cells to the width of the
+                # headers
+                record = record_type.from_row(header_tuple, row + padding)
+                records.append(cast(RecordType, record))
             except Exception:
                 pass
-        logger(f"Found {len(records)} records!")
         return records
 
     def set_records(
@@ -141,22 +228,45 @@ class SpreadsheetStorer(RecordStorer[RecordType]):
               events
             debug (bool): Whether to run in debug mode. Defaults to False
         """
-        # Hacky way to get the generic data type
-        record_type = get_args(self.__orig_class__)[0]  # type: ignore
-
-        cells = [["Last Updated:", datetime.now().strftime("%Y-%m-%d %H:%M")]]
-        cells.append(record_type.headers)
-        for record in rec_list:
-            cells.append(record.to_strings())
+        cells = [
+            ["Last Updated:", datetime.now().strftime("%Y-%m-%d %H:%M")],
+            self._record_headers,
+            *[record.to_strings() for record in rec_list],
+        ]
 
         if debug:
             logger("DEBUG: Avoiding storing records")
         else:
             with GLock(self.lock_id(), "w") as _:
-                sheet = retry_call(_sheets.open_by_key, self.configs.sheet_id)
-                worksheet = retry_call(sheet.worksheet, self.configs.tab)
-                retry_call(worksheet.clear)
-                retry_call(worksheet.update, cells)
+                worksheet = _open_worksheet(
+                    self.configs.sheet_id, self.configs.tab
+                )
+                old_cells = retry_call(worksheet.get_all_values)
+
+                # Rows are padded to the width of the worksheet
+                old_headers = (
+                    [cell for cell in old_cells[1] if cell]
+                    if len(old_cells) > 1
+                    else []
+                )
+                rewrite = old_headers != cells[1]
+
+                # Write the rows that changed (or every row, if the layout
+                # changed) in a single request, blanking out any leftover
+                # cells and rows rather than clearing the worksheet
+                updates: list[dict[str, Any]] = []
+                blank: list[str] = []
+                for idx in range(max(len(cells), len(old_cells))):
+                    row = cells[idx] if idx < len(cells) else blank
+                    old_row = old_cells[idx] if idx < len(old_cells) else blank
+                    new_row = row + [""] * (len(old_row) - len(row))
+                    if rewrite or new_row != old_row:
+                        updates.append(
+                            {"range": f"A{idx + 1}", "values": [new_row]}
+                        )
+                if updates:
+                    retry_call(worksheet.batch_update, updates)
             logger(
-                f"Stored records in '{self.configs.tab}' tab of {sheet.title}"
+                f"Stored records in '{self.configs.tab}' tab of "
+                f"{worksheet.spreadsheet.title}"
             )
@@ -5,7 +5,99 @@ Date: September 14th, 2024
 """
 
 from abc import ABC, abstractmethod
-from typing import Type, TypeVar
+from datetime import datetime
+import functools
+import re
+from typing import Optional, Type, TypeVar
+
+# -----------------------------------------------------------------------------
+# Formatting
+# -----------------------------------------------------------------------------
+# Common string representations for the fields of records
+
+# The format of datetimes in spreadsheets
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+# The representations of (optional) booleans, to look up rather than
+# converting each time
+BOOL_STRINGS: dict[Optional[bool], str] = {
+    True: "True",
+    False: "False",
+    None: "",
+}
+
+
+def format_opt(value: Optional[str | int | bool]) -> str:
+    """Convert an optional value to a string.
+
+    Args:
+        value (Optional[str | int | bool]): The value to convert
+
+    Returns:
+        str: The string representation, or an empty string if None
+    """
+    return "" if value is None else str(value)
+
+
+def format_opt_datetime(value: Optional[datetime]) -> str:
+    """Convert an optional datetime to a string.
+
+    Args:
+        value (Optional[datetime]): The value to convert
+
+    Returns:
+        str: The string representation, or an empty string if None
+    """
+    return "" if value is None else value.strftime(DATETIME_FORMAT)
+
+
+# -----------------------------------------------------------------------------
+# Parsing
+# -----------------------------------------------------------------------------
+
+# A pattern matching DATETIME_FORMAT, which is much cheaper to match than
+# going through datetime.strptime
+DATETIME_REGEX = re.compile(
+    r"(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2})\Z"
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_datetime(value: str) -> datetime:
+    """Parse a datetime in DATETIME_FORMAT, reusing previous results.
+
+    Many cells of a column hold the same timestamp (ex. every student
+    pinged in the same run), so each distinct string is only parsed once.
+    datetimes are immutable, so the results can safely be shared.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        datetime: The parsed value
+    """
+    match = DATETIME_REGEX.match(value)
+    if match is None:
+        # Let strptime handle (and report) anything unusual
+        return datetime.strptime(value, DATETIME_FORMAT)
+    year, month, day, hour, minute = map(int, match.groups())
+    return datetime(year, month, day, hour, minute)
+
+
+def parse_opt_datetime(value: str) -> Optional[datetime]:
+    """Parse an optional datetime in DATETIME_FORMAT.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        Optional[datetime]: The parsed value, or None if empty
+    """
+    if len(value) == 0:
+        return None
+    return _parse_datetime(value)
+
 
 # -----------------------------------------------------------------------------
 # SpreadsheetRecord
@@ -26,6 +118,9 @@ class SpreadsheetRecord(ABC):
     a list of strings.
     """
 
+    # Don't give instances a __dict__, so that children can use __slots__
+    __slots__ = ()
+
     # Records must define their headers
     @property
     @abstractmethod
@@ -68,3 +163,26 @@ class SpreadsheetRecord(ABC):
             SpreadsheetRecord: An instance of the class constructed
               from the provided data
         """
+
+    # Can be overriden to make itself from rows more efficiently
+    @classmethod
+    def from_row(
+        cls: Type[SpreadsheetRecordChild],
+        headers: tuple[str, ...],
+        row: list[str],
+    ) -> "SpreadsheetRecord":
+        """Construct itself from a row of strings under the given headers.
+
+        By default, this maps the headers to the row's data, and uses
+        from_strings. Records can override this to avoid building the
+        mapping for every row.
+
+        Args:
+            headers (tuple[str, ...]): The headers of the row's columns
+            row (list[str]): The row's data, at least as long as the headers
+
+        Returns:
+            SpreadsheetRecord: An instance of the class constructed
+              from the provided data
+        """
+        return cls.from_strings(dict(zip(headers, row)))
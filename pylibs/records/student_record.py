@@ -8,9 +8,143 @@ Date: September 14th, 2024
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, NotRequired, Type, TypeVar, TypedDict
+import functools
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    NotRequired,
+    Type,
+    TypeVar,
+    TypedDict,
+)
+
+from records.spreadsheet_record import (
+    BOOL_STRINGS,
+    format_opt,
+    format_opt_datetime,
+    parse_opt_datetime,
+    SpreadsheetRecord,
+)
+
+# -----------------------------------------------------------------------------
+# Parsers
+# -----------------------------------------------------------------------------
+# Functions to parse the string representation of each type of field
+
+
+def _parse_bool(value: str) -> bool:
+    """Parse a boolean.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        bool: The parsed value
+    """
+    return value == "True"
+
+
+def _parse_opt_bool(value: str) -> Optional[bool]:
+    """Parse an optional boolean.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        Optional[bool]: The parsed value, or None if empty
+    """
+    return None if len(value) == 0 else value == "True"
+
+
+def _parse_opt_str(value: str) -> Optional[str]:
+    """Parse an optional string.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        Optional[str]: The parsed value, or None if empty
+    """
+    return None if len(value) == 0 else value
+
+
+def _parse_opt_int(value: str) -> Optional[int]:
+    """Parse an optional integer.
+
+    Args:
+        value (str): The string representation
+
+    Returns:
+        Optional[int]: The parsed value, or None if empty
+    """
+    return None if len(value) == 0 else int(value)
+
+
+# The mandatory fields of a StudentRecord, as their header and attribute
+MANDATORY_SPECS: tuple[tuple[str, str], ...] = (
+    ("First Name", "first_name"),
+    ("Last Name", "last_name"),
+    ("NetID", "netid"),
+    ("CUID", "cuid"),
+)
+
+# The optional fields of a StudentRecord, as their header, attribute, and
+# parser
+FIELD_SPECS: tuple[tuple[str, str, Callable[[str], Any]], ...] = (
+    ("Enrolled?", "enrolled", _parse_bool),
+    ("GithubUsername", "github_username", _parse_opt_str),
+    ("ValidUsername?", "github_valid", _parse_opt_bool),
+    ("LastUsernamePing", "last_no_username_ping", parse_opt_datetime),
+    ("LastValidPing", "last_valid_ping", parse_opt_datetime),
+    ("SentInvite?", "sent_invite", _parse_bool),
+    ("InviteDate", "invite_date", parse_opt_datetime),
+    ("GithubAccepted?", "github_accepted", _parse_opt_bool),
+    ("LastAcceptedPing", "last_accepted_ping", parse_opt_datetime),
+    ("PersonalRepoName", "personal_repo_name", _parse_opt_str),
+    ("AddedToPersonal?", "added_to_personal", _parse_bool),
+    ("LastGroupPing", "last_group_ping", parse_opt_datetime),
+    ("GroupNum", "group_num", _parse_opt_int),
+    ("GroupRepoName", "group_repo_name", _parse_opt_str),
+    ("AddedToGroup?", "added_to_group", _parse_bool),
+)
+
+# The columns of fields for a given set of headers, as their column index
+# and attribute (along with their parser, for optional fields)
+MandatoryColumns = tuple[tuple[int, str], ...]
+OptionalColumns = tuple[tuple[int, str, Callable[[str], Any]], ...]
+
+
+@functools.lru_cache(maxsize=16)
+def _compile_parsers(
+    headers: tuple[str, ...],
+) -> tuple[MandatoryColumns, OptionalColumns]:
+    """Determine which column holds each field for a given set of headers.
+
+    Args:
+        headers (tuple[str, ...]): The headers of the columns
+
+    Raises:
+        Exception: Raised if a mandatory header is missing
+
+    Returns:
+        tuple[MandatoryColumns, OptionalColumns]: The columns of the
+          mandatory fields, and of the optional fields present
+    """
+    # Later columns take precedence, as when mapping headers to data
+    columns = {header: idx for idx, header in enumerate(headers)}
+    for header, _ in MANDATORY_SPECS:
+        if header not in columns:
+            raise Exception(f"Missing header '{header}' for StudentRecord")
+    return (
+        tuple((columns[header], attr) for header, attr in MANDATORY_SPECS),
+        tuple(
+            (columns[header], attr, parser)
+            for header, attr, parser in FIELD_SPECS
+            if header in columns
+        ),
+    )
 
-from records.spreadsheet_record import SpreadsheetRecord
 
 # -----------------------------------------------------------------------------
 # StudentRecord
@@ -47,7 +181,7 @@ StudentRecordAttrs = TypedDict(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentRecord(SpreadsheetRecord):
     """A record indicating a student's status in the class.
 
@@ -144,41 +278,28 @@ class StudentRecord(SpreadsheetRecord):
         Returns:
             list[str]: The strings that represent the record
         """
-
-        def opt_attr(value: Optional[str | int | bool]) -> str:
-            """Convert an optional string to a string."""
-            return "" if value is None else str(value)
-
-        def opt_datetime_attr(value: Optional[datetime]) -> str:
-            """Convert an optional datetime to a string."""
-            return "" if value is None else value.strftime("%Y-%m-%d %H:%M")
-
-        record_map = {
-            "First Name": self.first_name,
-            "Last Name": self.last_name,
-            "NetID": self.netid,
-            "CUID": self.cuid,
-            "Enrolled?": str(self.enrolled),
-            "GithubUsername": opt_attr(self.github_username),
-            "ValidUsername?": opt_attr(self.github_valid),
-            "LastUsernamePing": opt_datetime_attr(self.last_no_username_ping),
-            "LastValidPing": opt_datetime_attr(self.last_valid_ping),
-            "SentInvite?": str(self.sent_invite),
-            "InviteDate": opt_datetime_attr(self.invite_date),
-            "GithubAccepted?": opt_attr(self.github_accepted),
-            "LastAcceptedPing": opt_datetime_attr(self.last_accepted_ping),
-            "PersonalRepoName": opt_attr(self.personal_repo_name),
-            "AddedToPersonal?": str(self.added_to_personal),
-            "LastGroupPing": opt_datetime_attr(self.last_group_ping),
-            "GroupNum": opt_attr(self.group_num),
-            "GroupRepoName": opt_attr(self.group_repo_name),
-            "AddedToGroup?": str(self.added_to_group),
-        }
-
-        row_repr = []
-        for i in range(len(self.headers)):
-            row_repr.append(record_map[self.headers[i]])
-        return row_repr
+        # In the same order as the headers
+        return [
+            self.first_name,
+            self.last_name,
+            self.netid,
+            self.cuid,
+            BOOL_STRINGS[self.enrolled],
+            format_opt(self.github_username),
+            BOOL_STRINGS[self.github_valid],
+            format_opt_datetime(self.last_no_username_ping),
+            format_opt_datetime(self.last_valid_ping),
+            BOOL_STRINGS[self.sent_invite],
+            format_opt_datetime(self.invite_date),
+            BOOL_STRINGS[self.github_accepted],
+            format_opt_datetime(self.last_accepted_ping),
+            format_opt(self.personal_repo_name),
+            BOOL_STRINGS[self.added_to_personal],
+            format_opt_datetime(self.last_group_ping),
+            format_opt(self.group_num),
+            format_opt(self.group_repo_name),
+            BOOL_STRINGS[self.added_to_group],
+        ]
 
     @classmethod
     def from_strings(
@@ -197,134 +318,46 @@ class StudentRecord(SpreadsheetRecord):
         Returns:
             StudentRecord: The corresponding record with the desired data
         """
-        # First check that we have the mandatory headers
-        mandatory_headers = ["First Name", "Last Name", "NetID", "CUID"]
-        for header in mandatory_headers:
+        # First check that we have the mandatory headers, and use them as
+        # the arguments
+        args: dict[str, Any] = {}
+        for header, attr in MANDATORY_SPECS:
             if header not in header_mapping:
                 raise Exception(f"Missing header '{header}' for StudentRecord")
+            args[attr] = header_mapping[header]
 
-        # From here, create the arguments
-        args: StudentRecordAttrs = {
-            "first_name": header_mapping["First Name"],
-            "last_name": header_mapping["Last Name"],
-            "netid": header_mapping["NetID"],
-            "cuid": header_mapping["CUID"],
-        }
+        # Get all the other arguments we have, parsing each with the
+        # parser for its header
+        get = header_mapping.get
+        for header, attr, parser in FIELD_SPECS:
+            value = get(header)
+            if value is not None:
+                args[attr] = parser(value)
+
+        return cls(**args)
+
+    @classmethod
+    def from_row(
+        cls: Type[StudentRecordChild],
+        headers: tuple[str, ...],
+        row: list[str],
+    ) -> StudentRecordChild:
+        """Form a StudentRecord from a row of data under the given headers.
 
-        # Get all the other arguments we have
-        if "Enrolled?" in header_mapping:
-            args["enrolled"] = (
-                True if header_mapping["Enrolled?"] == "True" else False
-            )
-
-        if "GithubUsername" in header_mapping:
-            args["github_username"] = (
-                None
-                if len(header_mapping["GithubUsername"]) == 0
-                else header_mapping["GithubUsername"]
-            )
-
-        if "ValidUsername?" in header_mapping:
-            args["github_valid"] = (
-                None
-                if len(header_mapping["ValidUsername?"]) == 0
-                else (
-                    True
-                    if header_mapping["ValidUsername?"] == "True"
-                    else False
-                )
-            )
-
-        if "LastUsernamePing" in header_mapping:
-            args["last_no_username_ping"] = (
-                None
-                if len(header_mapping["LastUsernamePing"]) == 0
-                else datetime.strptime(
-                    header_mapping["LastUsernamePing"], "%Y-%m-%d %H:%M"
-                )
-            )
-
-        if "LastValidPing" in header_mapping:
-            args["last_valid_ping"] = (
-                None
-                if len(header_mapping["LastValidPing"]) == 0
-                else datetime.strptime(
-                    header_mapping["LastValidPing"], "%Y-%m-%d %H:%M"
-                )
-            )
-
-        if "SentInvite?" in header_mapping:
-            args["sent_invite"] = (
-                True if header_mapping["SentInvite?"] == "True" else False
-            )
-
-        if "InviteDate" in header_mapping:
-            args["invite_date"] = (
-                None
-                if len(header_mapping["InviteDate"]) == 0
-                else datetime.strptime(
-                    header_mapping["InviteDate"], "%Y-%m-%d %H:%M"
-                )
-            )
-
-        if "GithubAccepted?" in header_mapping:
-            args["github_accepted"] = (
-                None
-                if len(header_mapping["GithubAccepted?"]) == 0
-                else (
-                    True
-                    if header_mapping["GithubAccepted?"] == "True"
-                    else False
-                )
-            )
-
-        if "LastAcceptedPing" in header_mapping:
-            args["last_accepted_ping"] = (
-                None
-                if len(header_mapping["LastAcceptedPing"]) == 0
-                else datetime.strptime(
-                    header_mapping["LastAcceptedPing"], "%Y-%m-%d %H:%M"
-                )
-            )
-
-        if "PersonalRepoName" in header_mapping:
-            args["personal_repo_name"] = (
-                None
-                if len(header_mapping["PersonalRepoName"]) == 0
-                else header_mapping["PersonalRepoName"]
-            )
-
-        if "AddedToPersonal?" in header_mapping:
-            args["added_to_personal"] = (
-                True if header_mapping["AddedToPersonal?"] == "True" else False
-            )
-
-        if "LastGroupPing" in header_mapping:
-            args["last_group_ping"] = (
-                None
-                if len(header_mapping["LastGroupPing"]) == 0
-                else datetime.strptime(
-                    header_mapping["LastGroupPing"], "%Y-%m-%d %H:%M"
-                )
-            )
-
-        if "GroupNum" in header_mapping:
-            args["group_num"] = (
-                None
-                if len(header_mapping["GroupNum"]) == 0
-                else int(header_mapping["GroupNum"])
-            )
-
-        if "GroupRepoName" in header_mapping:
-            args["group_repo_name"] = (
-                None
-                if len(header_mapping["GroupRepoName"]) == 0
-                else header_mapping["GroupRepoName"]
-            )
-
-        if "AddedToGroup?" in header_mapping:
-            args["added_to_group"] = (
-                True if header_mapping["AddedToGroup?"] == "True" else False
-            )
+        The columns of each field are only determined once for each set of
+        headers, rather than mapping the headers to the data of each row.
 
+        Args:
+            headers (tuple[str, ...]): The headers of the row's columns
+            row (list[str]): The row's data, at least as long as the headers
+
+        Returns:
+            StudentRecord: The corresponding record with the desired data
+        """
+        mandatory_columns, optional_columns = _compile_parsers(headers)
+        args: dict[str, Any] = {
+            attr: row[idx] for idx, attr in mandatory_columns
+        }
+        for idx, attr, parser in optional_columns:
+            args[attr] = parser(row[idx])
         return cls(**args)
@@ -8,17 +8,22 @@ Date: September 19th, 2024
 
 from dataclasses import dataclass
 from datetime import datetime
-from itertools import chain
-from typing import Literal, Optional, Type, TypeGuard, TypeVar
+import functools
+from typing import Any, Literal, Optional, Type, TypeGuard, TypeVar
 
-from records.spreadsheet_record import SpreadsheetRecord
+from records.spreadsheet_record import (
+    format_opt,
+    format_opt_datetime,
+    parse_opt_datetime,
+    SpreadsheetRecord,
+)
 
 # -----------------------------------------------------------------------------
 # TagRecord
 # -----------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class TagRecord:
     """A (possible) representation of a tag on a repository.
 
@@ -70,6 +75,25 @@ def is_repo_type(
     return repo_type in ("personal", "group")
 
 
+@functools.lru_cache(maxsize=16)
+def _tag_headers(labs: tuple[str, ...]) -> tuple[str, ...]:
+    """Create the headers for a TagRecords in a single pass.
+
+    Args:
+        labs (tuple[str, ...]): The labs that a TagRecords hold
+
+    Returns:
+        tuple[str, ...]: The corresponding spreadsheet headers
+    """
+    headers = ["RepoName", "RepoType"]
+    for lab in labs:
+        headers.append(f"{lab}-TagName")
+        headers.append(f"{lab}-TagDate")
+        headers.append(f"{lab}-RefSHA")
+        headers.append(f"{lab}-CommitSHA")
+    return tuple(headers)
+
+
 def get_tag_headers(labs: list[str]) -> list[str]:
     """Create the headers for a TagRecords, based on its labs.
 
@@ -81,18 +105,8 @@ def get_tag_headers(labs: list[str]) -> list[str]:
           The corresponding spreadsheet headers that should be used to
           represent the TagRecords
     """
-    lab_headers_nested = [
-        [
-            f"{lab}-TagName",
-            f"{lab}-TagDate",
-            f"{lab}-RefSHA",
-            f"{lab}-CommitSHA",
-        ]
-        for lab in labs
-    ]
-    lab_headers = list(chain.from_iterable(lab_headers_nested))
-    headers = ["RepoName", "RepoType"] + lab_headers
-    return headers
+    # Return a new list, as the cached headers are shared
+    return list(_tag_headers(tuple(labs)))
 
 
 class TagRecords(SpreadsheetRecord):
@@ -105,6 +119,34 @@ class TagRecords(SpreadsheetRecord):
     # for their labs
     headers: list[str] = []
 
+    # The name of each lab, along with its headers (for the tag name, date,
+    # reference SHA, and commit SHA). This is computed once when a subclass
+    # defines its labs, rather than on every conversion
+    lab_headers: list[tuple[str, str, str, str, str]] = []
+
+    # Whether the headers are in the order of get_tag_headers, in which case
+    # rows can be built directly in that order
+    standard_headers = False
+
+    def __init_subclass__(cls: Type["TagRecords"], **kwargs: Any) -> None:
+        """Compute the headers of each lab when a subclass is defined.
+
+        Args:
+            kwargs (Any): Any keyword arguments for parent classes
+        """
+        super().__init_subclass__(**kwargs)
+        cls.lab_headers = [
+            (
+                lab,
+                f"{lab}-TagName",
+                f"{lab}-TagDate",
+                f"{lab}-RefSHA",
+                f"{lab}-CommitSHA",
+            )
+            for lab in cls.labs
+        ]
+        cls.standard_headers = cls.headers == get_tag_headers(cls.labs)
+
     def __init__(
         self: "TagRecords",
         repo_name: str,
@@ -136,32 +178,31 @@ class TagRecords(SpreadsheetRecord):
         Returns:
             list[str]: The string representation
         """
-
-        def opt_attr(value: Optional[str | bool]) -> str:
-            """Convert an optional string to a string."""
-            return "" if value is None else str(value)
-
-        def opt_datetime_attr(value: Optional[datetime]) -> str:
-            """Convert an optional datetime to a string."""
-            return "" if value is None else value.strftime("%Y-%m-%d %H:%M")
+        if self.standard_headers:
+            # Build the row directly, in the order of the headers
+            row_repr = [self.repo_name, self.repo_type]
+            for lab in self.labs:
+                tag_record = getattr(self, lab)
+                row_repr.append(format_opt(tag_record.name))
+                row_repr.append(format_opt_datetime(tag_record.time))
+                row_repr.append(format_opt(tag_record.ref_sha))
+                row_repr.append(format_opt(tag_record.commit_sha))
+            return row_repr
 
         record_map = {"RepoName": self.repo_name, "RepoType": self.repo_type}
-        for lab in self.labs:
-            record_map.update(
-                {
-                    f"{lab}-TagName": opt_attr(getattr(self, lab).name),
-                    f"{lab}-TagDate": opt_datetime_attr(
-                        getattr(self, lab).time
-                    ),
-                    f"{lab}-RefSHA": opt_attr(getattr(self, lab).ref_sha),
-                    f"{lab}-CommitSHA": opt_attr(getattr(self, lab).commit_sha),
-                }
-            )
-
-        row_repr = []
-        for i in range(len(self.headers)):
-            row_repr.append(record_map[self.headers[i]])
-        return row_repr
+        for (
+            lab,
+            name_header,
+            date_header,
+            ref_header,
+            commit_header,
+        ) in self.lab_headers:
+            tag_record = getattr(self, lab)
+            record_map[name_header] = format_opt(tag_record.name)
+            record_map[date_header] = format_opt_datetime(tag_record.time)
+            record_map[ref_header] = format_opt(tag_record.ref_sha)
+            record_map[commit_header] = format_opt(tag_record.commit_sha)
+        return [record_map[header] for header in self.headers]
 
     @classmethod
     def from_strings(
@@ -198,24 +239,26 @@ class TagRecords(SpreadsheetRecord):
         )
 
         # Add all labs as needed
-        for lab in cls.labs:
+        get = header_mapping.get
+        for (
+            lab,
+            name_header,
+            date_header,
+            ref_header,
+            commit_header,
+        ) in cls.lab_headers:
+            name_data = get(name_header)
+            date_data = get(date_header)
+            ref_data = get(ref_header)
+            commit_data = get(commit_header)
             if (
-                f"{lab}-TagName" in header_mapping
-                and f"{lab}-TagDate" in header_mapping
-                and f"{lab}-RefSHA" in header_mapping
-                and f"{lab}-CommitSHA" in header_mapping
+                name_data is not None
+                and date_data is not None
+                and ref_data is not None
+                and commit_data is not None
             ):
-                name_data = header_mapping[f"{lab}-TagName"]
-                date_data = header_mapping[f"{lab}-TagDate"]
-                ref_data = header_mapping[f"{lab}-RefSHA"]
-                commit_data = header_mapping[f"{lab}-CommitSHA"]
-
                 name = None if len(name_data) == 0 else name_data
-                date = (
-                    None
-                    if len(date_data) == 0
-                    else datetime.strptime(date_data, "%Y-%m-%d %H:%M")
-                )
+                date = parse_opt_datetime(date_data)
                 ref = None if len(ref_data) == 0 else ref_data
                 commit = None if len(commit_data) == 0 else commit_data
 
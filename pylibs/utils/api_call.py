@@ -4,7 +4,8 @@ Author: Aidan McNay
 Date: October 3rd, 2024
 """
 
-import sys
+import random
+import time
 from typing import Callable, TypeVar
 
 # -----------------------------------------------------------------------------
@@ -17,27 +18,40 @@ KwargsType = TypeVar("KwargsType")
 
 NUM_TRIES = 10
 
+# Backoff between attempts (in seconds); the delay doubles after each failed
+# attempt, up to MAX_DELAY, and is stretched by up to JITTER (as a fraction)
+# so that concurrent callers don't retry in lockstep
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+JITTER = 0.5
+
 
 def retry_call(
-    func: Callable[..., ReturnType], *args: ArgsType, **kwargs: KwargsType
+    func: Callable[..., ReturnType],
+    *args: ArgsType,
+    retry_on: tuple[type[Exception], ...] = (Exception,),
+    **kwargs: KwargsType,
 ) -> ReturnType:
-    """Try a function a given number of times.
+    """Try a function a given number of times, backing off between tries.
+
+    The first retry is immediate, to quickly recover from one-off failures;
+    later retries wait exponentially longer, so that a short outage (or rate
+    limit) can pass before the tries are exhausted.
 
     Args:
         func (Callable[[...], ReturnType]): The function to try
-        num_tries (int, optional): The number of times to try calling the
-          function. Defaults to 10.
+        retry_on (tuple[type[Exception], ...], optional): The exceptions to
+          retry on; any others are raised immediately. Defaults to
+          (Exception,).
 
     Returns:
         ReturnType: What the function returned, if it succeeded
     """
-    num_tries = NUM_TRIES
-    while num_tries > 0:
+    for attempt in range(NUM_TRIES - 1):
         try:
             return func(*args, **kwargs)
-        except Exception as e:
-            num_tries -= 1
-            if num_tries == 0:
-                raise e
-    # Never reach here
-    sys.exit(1)
+        except retry_on:
+            if attempt > 0:
+                delay = min(MAX_DELAY, BASE_DELAY * (2**attempt))
+                time.sleep(delay * (1 + random.uniform(0, JITTER)))
+    return func(*args, **kwargs)
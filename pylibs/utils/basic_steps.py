@@ -4,11 +4,13 @@ Author: Aidan McNay
 Date: December 29th, 2024
 """
 
+from operator import itemgetter
 import os
 from pathlib import Path
 import random
+import stat
 from threading import Lock
-from typing import Any, Callable, Self
+from typing import Any, Callable, Optional, Self
 
 from flow.flow_steps import FlowRecordStep, FlowUpdateStep, FlowPropagateStep
 from flow.record_storer import RecordStorer
@@ -27,14 +29,40 @@ class BasicRecordStorer(RecordStorer[int]):
 
     def validate(self: "BasicRecordStorer") -> None:
         """Validate the configurations for the step."""
-        if not os.path.isfile(self.configs.file_path):
-            if os.path.exists(self.configs.file_path):
-                raise Exception("Path exists, but isn't file!")
+        # The last records read or written, and the file's modification time
+        # (in nanoseconds) when they were
+        self._cached_records: Optional[list[int]] = None
+        self._cached_mtime: Optional[int] = None
+
+        try:
+            file_stat = os.stat(self.configs.file_path)
+        except FileNotFoundError:
             Path(self.configs.file_path).touch()
-        else:
-            # Make sure we can interpret the path as a list of integers
-            with open(self.configs.file_path, "r") as f:
-                _ = [int(x) for x in f.readlines()]
+            return
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise Exception("Path exists, but isn't file!")
+
+        # Make sure we can interpret the path as a list of integers (and keep
+        # them for the first call to get_records)
+        self._read_records()
+
+    def _read_records(self: Self) -> list[int]:
+        """Read the records from the file, caching them.
+
+        Args:
+            self (Self): The storer to read records for
+
+        Returns:
+            list[int]: The records in the file
+        """
+        with open(self.configs.file_path, "r") as f:
+            # Get the modification time first, so that a concurrent change
+            # invalidates what we read
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            records = [int(x) for x in f]
+        self._cached_records = records
+        self._cached_mtime = mtime
+        return list(records)
 
     def get_records(
         self: "BasicRecordStorer",
@@ -51,8 +79,15 @@ class BasicRecordStorer(RecordStorer[int]):
         Returns:
             list[T]: The retrieved records
         """
-        with open(self.configs.file_path, "r") as f:
-            records = [int(x) for x in f.readlines()]
+        # Reuse the cached records if the file hasn't changed since
+        if (
+            self._cached_records is not None
+            and os.stat(self.configs.file_path).st_mtime_ns
+            == self._cached_mtime
+        ):
+            records = list(self._cached_records)
+        else:
+            records = self._read_records()
         if debug:
             logger(
                 f"DEBUG: Found {len(records)} records in "
@@ -80,7 +115,9 @@ class BasicRecordStorer(RecordStorer[int]):
                 f"{self.configs.file_path}"
             )
         with open(self.configs.file_path, "w") as f:
-            f.writelines("\n".join(str(x) for x in rec_list))
+            f.write("\n".join(map(str, rec_list)))
+        self._cached_records = list(rec_list)
+        self._cached_mtime = os.stat(self.configs.file_path).st_mtime_ns
 
 
 # -----------------------------------------------------------------------------
@@ -216,9 +253,11 @@ class BasicPropagateStep(FlowPropagateStep[int]):
         Returns:
             list[int]: The new list of records
         """
-        sum = 0
-        for record, _ in records:
-            if debug:
+        if debug:
+            total = 0
+            for record, _ in records:
                 logger(f"DEBUG: Adding {record} to sum...")
-            sum += record
-        logger(f"Record sum: {sum}")
+                total += record
+        else:
+            total = sum(map(itemgetter(0), records))
+        logger(f"Record sum: {total}")
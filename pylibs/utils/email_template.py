@@ -0,0 +1,54 @@
+"""A template for emails, with placeholders to fill in for each recipient.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+import re
+from typing import Self
+
+# -----------------------------------------------------------------------------
+# EmailTemplate
+# -----------------------------------------------------------------------------
+
+
+class EmailTemplate:
+    """An email template, split around its placeholders once.
+
+    Placeholders are written as <name> in the template. Splitting the
+    template up front means that rendering it for each recipient only
+    joins the pieces, rather than scanning the whole template once per
+    placeholder.
+    """
+
+    def __init__(self: Self, template: str, placeholders: list[str]) -> None:
+        """Split a template around its placeholders.
+
+        Args:
+            template (str): The text of the template
+            placeholders (list[str]): The names of the placeholders (without
+              the angle brackets)
+        """
+        pattern = re.compile(
+            "<({})>".format("|".join(re.escape(name) for name in placeholders))
+        )
+
+        # Alternates literal text and placeholder names, starting (and
+        # ending) with literal text
+        self._segments = pattern.split(template)
+
+    def render(self: Self, values: dict[str, str]) -> str:
+        """Fill in the template's placeholders.
+
+        Args:
+            values (dict[str, str]): A mapping of placeholder names to the
+              text to replace them with
+
+        Returns:
+            str: The filled-in template
+        """
+        segments = self._segments
+        parts = segments.copy()
+        for idx in range(1, len(segments), 2):
+            parts[idx] = values[segments[idx]]
+        return "".join(parts)
@@ -0,0 +1,58 @@
+"""A proxy for objects that are expensive (or impossible) to create early.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+from threading import Lock
+from typing import Callable, Generic, Optional, TypeVar
+
+# -----------------------------------------------------------------------------
+# Lazy
+# -----------------------------------------------------------------------------
+# A stand-in for an object that is only created once an attribute is accessed
+
+ObjectType = TypeVar("ObjectType")
+
+
+class Lazy(Generic[ObjectType]):
+    """A proxy that creates the underlying object on first attribute access.
+
+    Users should cast the proxy to the type of the underlying object, as
+    attributes are only forwarded at runtime.
+    """
+
+    def __init__(
+        self: "Lazy[ObjectType]", factory: Callable[[], ObjectType]
+    ) -> None:
+        """Store the factory used to create the underlying object.
+
+        Args:
+            factory (Callable[[], ObjectType]): A function to create the
+              object
+        """
+        self._factory = factory
+        self._obj: Optional[ObjectType] = None
+        self._lock = Lock()
+
+    def _get(self: "Lazy[ObjectType]") -> ObjectType:
+        """Get the underlying object, creating it if needed.
+
+        Returns:
+            ObjectType: The underlying object
+        """
+        with self._lock:
+            if self._obj is None:
+                self._obj = self._factory()
+            return self._obj
+
+    def __getattr__(self: "Lazy[ObjectType]", name: str) -> object:
+        """Forward attribute accesses to the underlying object.
+
+        Args:
+            name (str): The name of the attribute
+
+        Returns:
+            object: The attribute of the underlying object
+        """
+        return getattr(self._get(), name)
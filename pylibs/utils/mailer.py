@@ -11,15 +11,24 @@ Date: September 16th, 2024
 import os
 import smtplib
 import ssl
+from threading import local, Lock
+import time
 from typing import Optional, Self
 
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 
 # ------------------------------------------------------------------------
 # GmailMailer
 # ------------------------------------------------------------------------
 
+# Loading the system's certificates is relatively expensive, so all
+# connections share one context (which is safe to use across threads)
+_ssl_context = ssl.create_default_context()
+
+# How long (in seconds) a connection can sit idle before we check that the
+# server hasn't closed it
+IDLE_CHECK_AFTER = 60
+
 
 class Mailer:
     """An object-oriented abstraction for sending an email through Gmail.
@@ -35,11 +44,55 @@ class Mailer:
             sender_email (str): The email to send emails from
         """
         self.email = sender_email
+        self._api_key = os.environ["GMAIL_API_KEY"]
+        self.smtp_client = self._connect()
+
+    def _connect(self: Self) -> smtplib.SMTP_SSL:
+        """Open a new connection to the Gmail SMTP server, and log in.
+
+        Args:
+            self (Self): The mailer to connect
 
-        self.smtp_client = smtplib.SMTP_SSL(
-            "smtp.gmail.com", 465, context=ssl.create_default_context()
+        Returns:
+            smtplib.SMTP_SSL: The logged-in SMTP client
+        """
+        smtp_client = smtplib.SMTP_SSL(
+            "smtp.gmail.com", 465, context=_ssl_context
         )
-        self.smtp_client.login(self.email, os.environ["GMAIL_API_KEY"])
+        smtp_client.login(self.email, self._api_key)
+        self._last_used = time.monotonic()
+        return smtp_client
+
+    def _ensure_alive(self: Self) -> None:
+        """Reconnect if an idle connection has been closed by the server.
+
+        Recently-used connections are assumed to still be open, so that we
+        don't pay for a round-trip before each email.
+
+        Args:
+            self (Self): The mailer to check
+        """
+        if time.monotonic() - self._last_used < IDLE_CHECK_AFTER:
+            return
+        try:
+            code, _ = self.smtp_client.noop()
+        except OSError:
+            code = -1
+        if code != 250:
+            self.smtp_client.close()
+            self.smtp_client = self._connect()
+
+    def close(self: Self) -> None:
+        """Log out of the SMTP server and close the connection.
+
+        Args:
+            self (Self): The mailer to close
+        """
+        try:
+            self.smtp_client.quit()
+        except (smtplib.SMTPException, OSError):
+            # The server may have already dropped the connection
+            self.smtp_client.close()
 
     def send(
         self: Self,
@@ -64,7 +117,7 @@ class Mailer:
         if text_type not in ("plain", "html"):
             raise Exception(f"Invalid text type: {text_type}")
 
-        msg = MIMEMultipart()
+        msg = EmailMessage()
         msg["From"] = self.email
         msg["To"] = recipient
         msg["Subject"] = subject
@@ -72,13 +125,99 @@ class Mailer:
             msg["Cc"] = cc
         if bcc:
             msg["Bcc"] = bcc
-        msg.attach(MIMEText(body, text_type))
+        msg.set_content(body, subtype=text_type)
 
+        self._ensure_alive()
         try:
-            self.smtp_client.sendmail(self.email, recipient, msg.as_string())
-        except Exception:
-            self.smtp_client = smtplib.SMTP_SSL(
-                "smtp.gmail.com", 465, context=ssl.create_default_context()
-            )
-            self.smtp_client.login(self.email, os.environ["GMAIL_API_KEY"])
-            self.smtp_client.sendmail(self.email, recipient, msg.as_string())
+            self.smtp_client.send_message(msg)
+        except OSError as e:
+            # Only retry if we lost the connection; other SMTP errors (ex.
+            # a refused recipient) would just fail again
+            if isinstance(e, smtplib.SMTPException) and not isinstance(
+                e, smtplib.SMTPServerDisconnected
+            ):
+                raise
+            self.smtp_client.close()
+            self.smtp_client = self._connect()
+            self.smtp_client.send_message(msg)
+        self._last_used = time.monotonic()
+
+
+# ------------------------------------------------------------------------
+# MailerPool
+# ------------------------------------------------------------------------
+
+# The number of emails to send concurrently (well within Gmail's limit on
+# simultaneous SMTP connections)
+MAIL_WORKERS = 8
+
+
+class MailerPool:
+    """A set of mailers for sending emails concurrently.
+
+    Each thread that sends an email lazily logs in with its own Mailer (as
+    an SMTP connection can't be shared between threads), and reuses it for
+    all of its emails until the pool is closed.
+    """
+
+    def __init__(self: Self, sender_email: str) -> None:
+        """Create an (initially empty) pool of mailers.
+
+        Args:
+            sender_email (str): The email to send emails from
+        """
+        self.email = sender_email
+        self._local = local()
+        self._mailers: list[Mailer] = []
+        self._mailers_lock = Lock()
+
+    def _get_mailer(self: Self) -> Mailer:
+        """Get the current thread's mailer, logging in if needed.
+
+        Args:
+            self (Self): The pool to get a mailer from
+
+        Returns:
+            Mailer: The mailer for the current thread
+        """
+        mailer: Optional[Mailer] = getattr(self._local, "mailer", None)
+        if mailer is None:
+            mailer = Mailer(self.email)
+            self._local.mailer = mailer
+            with self._mailers_lock:
+                self._mailers.append(mailer)
+        return mailer
+
+    def send(
+        self: Self,
+        recipient: str,
+        subject: str,
+        body: str,
+        cc: Optional[str] = None,
+        bcc: Optional[str] = None,
+        text_type: str = "plain",
+    ) -> None:
+        """Send an email with the current thread's mailer.
+
+        Args:
+            recipient (str): The email of the recipient
+            subject (str): The subject of the email
+            body (str): The body of the email
+            cc (Optional[str]): The email to cc, if any
+            bcc (Optional[str]): The email to bcc, if any
+            text_type (str): The type of text we're sending, either 'plain'
+              or 'html'. Defaults to 'plain'
+        """
+        self._get_mailer().send(recipient, subject, body, cc, bcc, text_type)
+
+    def close(self: Self) -> None:
+        """Close all of the pool's mailers.
+
+        Args:
+            self (Self): The pool to close
+        """
+        with self._mailers_lock:
+            mailers, self._mailers = self._mailers, []
+        for mailer in mailers:
+            mailer.close()
+        self._local = local()
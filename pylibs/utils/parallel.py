@@ -0,0 +1,82 @@
+"""Utilities for running API calls concurrently.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Iterable, TypeVar
+
+# -----------------------------------------------------------------------------
+# prefetch
+# -----------------------------------------------------------------------------
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ReturnType = TypeVar("ReturnType")
+
+NUM_WORKERS = 16
+
+
+def prefetch(
+    func: Callable[[KeyType], ReturnType],
+    keys: Iterable[KeyType],
+    num_workers: int = NUM_WORKERS,
+) -> dict[KeyType, ReturnType]:
+    """Call a function on each unique key concurrently.
+
+    This is meant for independent lookups (ex. users or teams on GitHub),
+    where the time is dominated by waiting on the network.
+
+    Args:
+        func (Callable[[KeyType], ReturnType]): The function to call
+        keys (Iterable[KeyType]): The keys to call the function on
+        num_workers (int, optional): The maximum number of concurrent calls.
+          Defaults to 16.
+
+    Returns:
+        dict[KeyType, ReturnType]: A mapping of keys to the function's result.
+          Keys where the function raised an exception are omitted
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures: dict[KeyType, Future[ReturnType]] = {
+            key: executor.submit(func, key) for key in set(keys)
+        }
+    return {
+        key: future.result()
+        for key, future in futures.items()
+        if future.exception() is None
+    }
+
+
+# -----------------------------------------------------------------------------
+# run_parallel
+# -----------------------------------------------------------------------------
+
+ItemType = TypeVar("ItemType")
+
+
+def run_parallel(
+    func: Callable[[ItemType], None],
+    items: Iterable[ItemType],
+    num_workers: int = NUM_WORKERS,
+) -> None:
+    """Call a function on each item concurrently.
+
+    All calls are run to completion, even if some of them fail; the first
+    exception raised (if any) is re-raised afterwards.
+
+    Args:
+        func (Callable[[ItemType], None]): The function to call
+        items (Iterable[ItemType]): The items to call the function on
+        num_workers (int, optional): The maximum number of concurrent calls.
+          Defaults to 16.
+
+    Raises:
+        BaseException: The first exception raised by a call, if any
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(func, item) for item in items]
+    for future in futures:
+        exception = future.exception()
+        if exception is not None:
+            raise exception
@@ -0,0 +1,229 @@
+"""A base class for steps that periodically email students.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+from abc import abstractmethod
+from datetime import datetime, timedelta
+import os
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional, Self
+
+from flow.flow_steps import FlowPropagateStep
+from records.student_record import StudentRecord
+from utils.email_template import EmailTemplate
+from utils.mailer import MAIL_WORKERS, Mailer, MailerPool
+from utils.parallel import run_parallel
+
+# -----------------------------------------------------------------------------
+# PingBase
+# -----------------------------------------------------------------------------
+
+
+class PingBase(FlowPropagateStep[StudentRecord]):
+    """A base class for emailing students (with a gap between emails).
+
+    Child classes must still define their description and configuration
+    types, which must include ``start_date``, ``email_gap``,
+    ``email_template``, ``send_email``, and ``subject``.
+
+    Attributes:
+     - placeholders (list[str]): The names of the placeholders that can be
+         used in the email template
+     - last_ping_attr (str): The attribute of a record that holds when the
+         student was last emailed by the step
+     - ping_reason (str): What students are being emailed about, for logging
+    """
+
+    placeholders: list[str] = []
+    last_ping_attr = "Not Set"
+    ping_reason = "Not Set"
+
+    def validate(self: Self) -> None:
+        """Validate the configurations for the step.
+
+        Args:
+            self (Self): The step to validate
+        """
+        if self.configs.email_gap <= 0:
+            raise Exception("Please choose a positive email gap!")
+        if not os.path.isfile(self.configs.email_template):
+            raise Exception(f"Path {self.configs.email_template} isn't a file!")
+
+        # Read the template up front; runs of the flow only re-read it if
+        # the file has since changed
+        self._template_mtime: Optional[int] = None
+        self._load_template()
+
+        # Make sure that we can access the email
+        try:
+            Mailer(self.configs.send_email).close()
+        except Exception:
+            raise Exception(
+                f"Couldn't log into '{self.configs.send_email}'"
+                " - double-check your API key"
+            )
+
+    def _load_template(self: Self) -> EmailTemplate:
+        """Get the email template, only re-reading it if it's changed.
+
+        Args:
+            self (Self): The relevant propagate step
+
+        Returns:
+            EmailTemplate: The (split) email template
+        """
+        mtime = os.stat(self.configs.email_template).st_mtime_ns
+        if mtime != self._template_mtime:
+            with open(self.configs.email_template, "r") as f:
+                self._template = EmailTemplate(f.read(), self.placeholders)
+            self._template_mtime = mtime
+        return self._template
+
+    @abstractmethod
+    def _should_email(self: Self, record: StudentRecord) -> bool:
+        """Determine whether a student needs an email, ignoring timing.
+
+        Args:
+            self (Self): The relevant propagate step
+            record (StudentRecord): The record to potentially ping
+
+        Returns:
+            bool: Whether the student needs an email
+        """
+        return False
+
+    @abstractmethod
+    def _placeholders(self: Self, record: StudentRecord) -> dict[str, str]:
+        """Get the values of the template's placeholders for a student.
+
+        Args:
+            self (Self): The relevant propagate step
+            record (StudentRecord): The record of the student to email
+
+        Returns:
+            dict[str, str]: A mapping of placeholder names to their values
+        """
+        return {}
+
+    def _gap_dates(
+        self: Self, record: StudentRecord
+    ) -> Iterable[Optional[datetime]]:
+        """Get the dates that emails must be spaced from.
+
+        Args:
+            self (Self): The relevant propagate step
+            record (StudentRecord): The record to potentially ping
+
+        Returns:
+            Iterable[Optional[datetime]]: The dates (if set) that another
+              email can't be sent within the gap of
+        """
+        return (getattr(record, self.last_ping_attr),)
+
+    def should_ping(
+        self: Self, record: StudentRecord, now: datetime, email_gap: timedelta
+    ) -> bool:
+        """Determine whether to ping a student, based on their record.
+
+        The start date is checked once by the caller, rather than for each
+        record.
+
+        Args:
+            self (Self): The relevant propagate step
+            record (StudentRecord): The record to potentially ping
+            now (datetime): The current time
+            email_gap (timedelta): The minimum time between emails
+
+        Returns:
+            bool: Whether to ping the student
+        """
+        for date in self._gap_dates(record):
+            if date:
+                # Always round to the hour the ping happened in, to avoid
+                # random drift over time
+                last_ping = date.replace(minute=0, second=0, microsecond=0)
+                if now - last_ping < email_gap:
+                    return False
+        return True
+
+    def propagate_records(
+        self: Self,
+        records: list[tuple[StudentRecord, Lock]],
+        logger: Callable[[str], None],
+        get_metadata: Callable[[str], Any],
+        set_metadata: Callable[[str, Any], None],
+        debug: bool = False,
+    ) -> None:
+        """Email students who need an email.
+
+        Args:
+            records (list[RecordType]): The list of records to manipulate
+            logger (Callable[[str], None]): A function to log any notable
+              events
+            get_metadata (Callable[[str], Any],): A function to retrieve global
+              metadata previously set in the flow
+            set_metadata (Callable[[str, Any], None]): A function to set
+              global metadata within the flow
+            debug (bool, optional): Whether we are in "debug" mode. In debug
+              mode, no external state should be modified, and we are free to
+              inject dummy information. Defaults to False.
+        """
+        # Don't ping before the scheduled date
+        now = datetime.now()
+        if now < self.configs.start_date:
+            return
+        email_gap = timedelta(days=self.configs.email_gap)
+
+        email_template = self._load_template()
+
+        # Send emails concurrently, with each worker logging in on its first
+        # email and reusing its connection afterwards
+        mailers = MailerPool(self.configs.send_email)
+
+        def ping_student(student: tuple[StudentRecord, Lock]) -> None:
+            """Email a student if they need an email.
+
+            Args:
+                student (tuple[StudentRecord, Lock]): The student's record
+                  and lock
+            """
+            record, lock = student
+
+            # Only hold the lock to check the record (and snapshot what the
+            # email needs) and to record the ping, not while sending
+            with lock:
+                if not (
+                    self._should_email(record)
+                    and self.should_ping(record, now, email_gap)
+                ):
+                    return
+                netid = record.netid
+                values = self._placeholders(record)
+
+            if debug:
+                logger(f"DEBUG: Not pinging {netid} for {self.ping_reason}")
+                return
+
+            mailers.send(
+                recipient=f"{netid}@cornell.edu",
+                subject=self.configs.subject,
+                body=email_template.render(values),
+            )
+            with lock:
+                setattr(record, self.last_ping_attr, datetime.now())
+            logger(f"Emailed {netid} about their {self.ping_reason}")
+
+        # Only a few students need pings; peek at their records without
+        # locking to find them, and re-check under the lock before emailing
+        candidates = [
+            (record, lock)
+            for record, lock in records
+            if self._should_email(record)
+        ]
+
+        try:
+            run_parallel(ping_student, candidates, num_workers=MAIL_WORKERS)
+        finally:
+            mailers.close()
@@ -7,7 +7,7 @@ Date: September 17th, 2024
 from datetime import datetime
 import os
 from threading import Lock
-from typing import Any, Callable, Self
+from typing import Any, Callable, Optional, Self
 
 from flow.flow_steps import FlowPropagateStep
 from records.student_record import StudentRecord
@@ -56,7 +56,7 @@ class PingInvalidUsername(FlowPropagateStep[StudentRecord]):
 
         # Make sure that we can access the email
         try:
-            Mailer(self.configs.send_email)
+            Mailer(self.configs.send_email).close()
         except Exception:
             raise Exception(
                 f"Couldn't log into '{self.configs.send_email}'"
@@ -115,6 +115,9 @@ class PingInvalidUsername(FlowPropagateStep[StudentRecord]):
         with open(self.configs.email_template, "r") as f:
             email_template = f.read()
 
+        # Only log in once (and only if someone needs an email), reusing the
+        # connection for all emails
+        mailer: Optional[Mailer] = None
         for record, lock in records:
             with lock:
                 if (
@@ -138,7 +141,8 @@ class PingInvalidUsername(FlowPropagateStep[StudentRecord]):
                             .replace("<username>", record.github_username)
                         )
 
-                        mailer = Mailer(self.configs.send_email)
+                        if mailer is None:
+                            mailer = Mailer(self.configs.send_email)
                         mailer.send(
                             recipient=recv_email,
                             subject=self.configs.subject,
@@ -149,3 +153,6 @@ class PingInvalidUsername(FlowPropagateStep[StudentRecord]):
                             f"Emailed {record.netid} about their "
                             "invalid username"
                         )
+
+        if mailer is not None:
+            mailer.close()
@@ -0,0 +1,79 @@
+"""A cache for function results that expire after a given time.
+
+Author: Aidan McNay
+Date: October 15th, 2026
+"""
+
+import functools
+from threading import Lock
+import time
+from typing import Callable, Hashable, ParamSpec, TypeVar
+
+# -----------------------------------------------------------------------------
+# ttl_cache
+# -----------------------------------------------------------------------------
+
+ParamsType = ParamSpec("ParamsType")
+ReturnType = TypeVar("ReturnType")
+
+
+def ttl_cache(
+    seconds: float,
+) -> Callable[
+    [Callable[ParamsType, ReturnType]], Callable[ParamsType, ReturnType]
+]:
+    """Cache a function's results (by its arguments) for a limited time.
+
+    This is meant for expensive listings (ex. all members of an
+    organization) that multiple callers need around the same time, but
+    that shouldn't be reused indefinitely. Results should be treated as
+    read-only, as they are shared between callers.
+
+    Args:
+        seconds (float): How long a result remains valid for
+
+    Returns:
+        Callable[[Callable[ParamsType, ReturnType]],
+          Callable[ParamsType, ReturnType]]: The decorator to apply
+    """
+
+    def decorator(
+        func: Callable[ParamsType, ReturnType],
+    ) -> Callable[ParamsType, ReturnType]:
+        """Wrap a function with a time-limited cache.
+
+        Args:
+            func (Callable[ParamsType, ReturnType]): The function to cache
+
+        Returns:
+            Callable[ParamsType, ReturnType]: The cached function
+        """
+        cache: dict[Hashable, tuple[float, ReturnType]] = {}
+        cache_lock = Lock()
+
+        @functools.wraps(func)
+        def wrapper(
+            *args: ParamsType.args, **kwargs: ParamsType.kwargs
+        ) -> ReturnType:
+            """Call the function, reusing a result if it hasn't expired.
+
+            Args:
+                args (ParamsType.args): The positional arguments
+                kwargs (ParamsType.kwargs): The keyword arguments
+
+            Returns:
+                ReturnType: The (possibly cached) result
+            """
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with cache_lock:
+                if key in cache and now - cache[key][0] < seconds:
+                    return cache[key][1]
+            result = func(*args, **kwargs)
+            with cache_lock:
+                cache[key] = (now, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -12,9 +12,11 @@ Date: September 21st, 2024
 
 import argparse
 import canvasapi
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import pydoc
 import sys
-from typing import Optional
+from typing import Any, cast, Optional
 
 from canvas_steps import _canvas, _course
 
@@ -22,7 +24,10 @@ from canvas_steps import _canvas, _course
 # Arguments
 # ------------------------------------------------------------------------
 
-info_present = "-i" in sys.argv or "--info" in sys.argv
+# Check for --info first, as it makes the other arguments optional
+info_parser = argparse.ArgumentParser(add_help=False)
+info_parser.add_argument("-i", "--info", action="store_true")
+info_present = info_parser.parse_known_args()[0].info
 
 parser = argparse.ArgumentParser(
     description=(
@@ -125,24 +130,50 @@ def print_multiple_sections(
 # ------------------------------------------------------------------------
 # Get the relevant category
 # ------------------------------------------------------------------------
+# Our requests are independent, so they share one pool of workers to run
+# concurrently. The sections are listed in the background while we find the
+# category
+
+executor = ThreadPoolExecutor(max_workers=16)
+
+sections_future = executor.submit(list, _course.get_sections())
 
 categories = _course.get_group_categories()
 
-category: Optional[canvasapi.group.GroupCategory] = None
-for curr_category in categories:
-    if curr_category.name == args.category:
-        category = curr_category
+# Stop at the first match, so that later pages aren't fetched
+category: Optional[canvasapi.group.GroupCategory] = next(
+    (
+        curr_category
+        for curr_category in categories
+        if curr_category.name == args.category
+    ),
+    None,
+)
 
 if category is None:
     print(f"No group category named '{args.category}' found!")
+    executor.shutdown(cancel_futures=True)
     sys.exit(1)
 
+# ------------------------------------------------------------------------
+# Start getting group members
+# ------------------------------------------------------------------------
+# Rather than listing each group's members, list all students once (along
+# with the groups they're in) in the background while we get the students
+# in each lab section
+
+groups_future = executor.submit(list, category.get_groups())
+course_students_future = executor.submit(
+    list,
+    _course.get_users(enrollment_type=["student"], include=["group_ids"]),
+)
+
 # ------------------------------------------------------------------------
 # Get students by lab section
 # ------------------------------------------------------------------------
 
 lab_sections = [
-    section for section in _course.get_sections() if "LAB" in section.name
+    section for section in sections_future.result() if "LAB" in section.name
 ]
 
 # {
@@ -152,33 +183,68 @@ lab_sections = [
 # }
 students_in_sections = {}
 
-for section in lab_sections:
-    name = section.name
-    student_objs = _canvas.get_section(section, include=["students"]).students
-    students = [_course.get_user(obj["id"]) for obj in student_objs]
-    for student in students:
-        students_in_sections[student.login_id] = name
+
+def get_student_objs(
+    section: canvasapi.section.Section,
+) -> list[dict[str, Any]]:
+    """Get the students in a section.
+
+    Args:
+        section (canvasapi.section.Section): The section to get students of
+
+    Returns:
+        list[dict[str, Any]]: The students in the section
+    """
+    return cast(
+        list[dict[str, Any]],
+        _canvas.get_section(section, include=["students"]).students,
+    )
+
+
+section_student_objs = list(executor.map(get_student_objs, lab_sections))
+
+# The section's student objects already include each student's login ID
+# (when we're allowed to see it); only look up the remaining users
+missing_login_ids: list[tuple[int, str]] = []
+for lab_section, student_objs in zip(lab_sections, section_student_objs):
+    for obj in student_objs:
+        if obj.get("login_id") is not None:
+            students_in_sections[obj["login_id"]] = lab_section.name
+        else:
+            missing_login_ids.append((obj["id"], lab_section.name))
+
+users = executor.map(
+    _course.get_user, [user_id for user_id, _ in missing_login_ids]
+)
+for user, (_, section_name) in zip(users, missing_login_ids):
+    students_in_sections[user.login_id] = section_name
 
 # ------------------------------------------------------------------------
 # Get groups
 # ------------------------------------------------------------------------
 
+groups = groups_future.result()
+
+# {
+#     group_id: [student1, student2, ...],
+#     ...
+# }
+group_members: defaultdict[int, list[canvasapi.user.User]] = defaultdict(list)
+for student in course_students_future.result():
+    for group_id in getattr(student, "group_ids", []):
+        group_members[group_id].append(student)
+
 num_mismatch_groups = 0
 
-groups = category.get_groups()
 for group in groups:
-    students = list(group.get_users())
+    students = group_members[group.id]
     if len(students) > 0:
         # Check section homogeneity
-        section = students_in_sections[students[0].login_id]
-        homogenous = all(
-            [
-                students_in_sections[student.login_id] == section
-                for student in students
-            ]
-        )
-        if homogenous:
-            print_same_section(group.name, section)
+        sections = {
+            students_in_sections[student.login_id] for student in students
+        }
+        if len(sections) == 1:
+            print_same_section(group.name, next(iter(sections)))
         else:
             print_multiple_sections(
                 group.name,
@@ -189,4 +255,5 @@ for group in groups:
             )
             num_mismatch_groups += 1
 
+executor.shutdown()
 sys.exit(num_mismatch_groups)
@@ -7,20 +7,27 @@ Date: December 29th, 2024
 
 import argparse
 import canvasapi
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 import datetime
 import pydoc
 import sys
+from threading import Lock
 from typing import Optional, Self, Union
 import yaml
 
 from canvas_steps import _course
+from flow.yaml_loader import YamlLoader
+from utils.parallel import run_parallel
 
 # ------------------------------------------------------------------------
 # Arguments
 # ------------------------------------------------------------------------
 
-info_present = "-i" in sys.argv or "--info" in sys.argv
+# Check for --info first, as it makes the other arguments optional
+info_parser = argparse.ArgumentParser(add_help=False)
+info_parser.add_argument("-i", "--info", action="store_true")
+info_present = info_parser.parse_known_args()[0].info
 
 parser = argparse.ArgumentParser(
     description=("A script to initialize a Canvas course"),
@@ -118,22 +125,29 @@ else:
     GREEN = "\033[1;32m"
     END = "\033[0m"
 
+# Components are created concurrently, so messages are printed one at a
+# time to avoid interleaving
+print_lock = Lock()
+
 
 def warning(msg: str, always_print: bool = True) -> None:
     """Print a warning."""
     if (not args.silent) or always_print:
-        print(f"{YELLOW}{msg}{END}")
+        with print_lock:
+            print(f"{YELLOW}{msg}{END}")
 
 
 def success(msg: str) -> None:
     """Print a success indicator."""
     if not args.silent:
-        print(f"{GREEN}{msg}{END}")
+        with print_lock:
+            print(f"{GREEN}{msg}{END}")
 
 
 def error(msg: str) -> None:
     """Print an error."""
-    print(f"{RED}{msg}{END}")
+    with print_lock:
+        print(f"{RED}{msg}{END}")
 
 
 # ------------------------------------------------------------------------
@@ -141,7 +155,71 @@ def error(msg: str) -> None:
 # ------------------------------------------------------------------------
 
 
-@dataclass
+def to_html(description: str) -> str:
+    """Format a description from the attributes file as HTML.
+
+    Blank lines separate paragraphs, and other line breaks are removed.
+
+    Args:
+        description (str): The description to format
+
+    Returns:
+        str: The HTML for the description
+    """
+    paragraphs = description.strip(" \n").split("\n\n")
+    body = "<br><br>".join(para.replace("\n", "") for para in paragraphs)
+    return f"<p>{body}</p>"
+
+
+@dataclass(slots=True)
+class ExistingComponents:
+    """The components that already exist in a course.
+
+    These are looked up once, rather than for each component we create.
+    Components are added as they're created (while holding the lock), so
+    that later components can refer to them.
+    """
+
+    assignment_group_ids: dict[str, int]
+    group_category_ids: dict[str, int]
+    assignment_names: set[str]
+    quiz_titles: set[str]
+    lock: Lock = field(default_factory=Lock)
+
+
+def find_existing(course: canvasapi.course.Course) -> ExistingComponents:
+    """Look up the components that already exist in a course.
+
+    Each kind of component is listed concurrently, as listing mostly waits
+    on Canvas.
+
+    Args:
+        course (canvasapi.course.Course): The course to look in
+
+    Returns:
+        ExistingComponents: The existing components of the course
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        groups = executor.submit(list, course.get_assignment_groups())
+        categories = executor.submit(list, course.get_group_categories())
+        assignment_list = executor.submit(list, course.get_assignments())
+        quiz_list = executor.submit(list, course.get_quizzes())
+
+    return ExistingComponents(
+        assignment_group_ids={
+            group.name: group.id for group in groups.result()
+        },
+        group_category_ids={
+            category.name: category.id for category in categories.result()
+        },
+        assignment_names={
+            assignment.name for assignment in assignment_list.result()
+        },
+        quiz_titles={quiz.title for quiz in quiz_list.result()},
+    )
+
+
+@dataclass(slots=True)
 class Assignment:
     """Representation of an assignment attribute."""
 
@@ -158,20 +236,22 @@ class Assignment:
     lock_at: Optional[datetime.datetime] = None
     unlock_at: Optional[datetime.datetime] = None
 
-    def create(self: Self, course: canvasapi.course.Course) -> None:
+    def create(
+        self: Self,
+        course: canvasapi.course.Course,
+        existing: ExistingComponents,
+    ) -> None:
         """Create the assignment in the given course.
 
         Args:
             course (canvasapi.course.Course): The course to create the
               assignment in
+            existing (ExistingComponents): The components that already
+              exist in the course
         """
         assignment_args = {
             "name": self.name,
-            "description": "<p>"
-            + self.description.strip(" \n")
-            .replace("\n\n", "<br><br>")
-            .replace("\n", "")
-            + "</p>",
+            "description": to_html(self.description),
             "submission_types": self.submission_types,
             "grading_type": self.grading_type,
             "published": self.published,
@@ -189,13 +269,11 @@ class Assignment:
             assignment_args["unlock_at"] = self.unlock_at
 
         if self.assignment_group:
-            found_group = False
-            for group in course.get_assignment_groups():
-                if group.name == self.assignment_group:
-                    found_group = True
-                    assignment_args["assignment_group_id"] = group.id
-                    break
-            if not found_group:
+            if self.assignment_group in existing.assignment_group_ids:
+                assignment_args["assignment_group_id"] = (
+                    existing.assignment_group_ids[self.assignment_group]
+                )
+            else:
                 error(
                     f"Couldn't add assignment '{self.name}' to assignment "
                     f"group {self.assignment_group}; no such assignment "
@@ -204,92 +282,116 @@ class Assignment:
                 sys.exit(1)
 
         if self.group_category:
-            found_group = False
-            for group in course.get_group_categories():
-                if group.name == self.group_category:
-                    found_group = True
-                    assignment_args["group_category_id"] = group.id
-                    break
-            if not found_group:
+            if self.group_category in existing.group_category_ids:
+                assignment_args["group_category_id"] = (
+                    existing.group_category_ids[self.group_category]
+                )
+            else:
                 error(
                     f"Couldn't add assignment '{self.name}' to group category "
                     f"{self.group_category}; no such group category exists..."
                 )
                 sys.exit(1)
 
-        for assignment in course.get_assignments():
-            if assignment.name == self.name:
-                warning(
-                    f"An assignment named '{self.name}' already "
-                    "exists; continuing..."
-                )
-                return
+        # Claim the name before creating, in case the same assignment is
+        # listed twice
+        with existing.lock:
+            exists = self.name in existing.assignment_names
+            existing.assignment_names.add(self.name)
+        if exists:
+            warning(
+                f"An assignment named '{self.name}' already "
+                "exists; continuing..."
+            )
+            return
 
         course.create_assignment(assignment=assignment_args)
         success(f"Created assignment '{self.name}'")
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentGroup:
     """Representation of an assignment group."""
 
     name: str
     weight: Optional[int] = None
 
-    def create(self: Self, course: canvasapi.course.Course) -> None:
+    def create(
+        self: Self,
+        course: canvasapi.course.Course,
+        existing: ExistingComponents,
+    ) -> None:
         """Create the assignment group in the given course.
 
         Args:
             course (canvasapi.course.Course): The course to create the
               assignment group in
+            existing (ExistingComponents): The components that already
+              exist in the course
         """
         assignment_group_args: dict[str, Union[str, int]] = {"name": self.name}
         if self.weight:
             assignment_group_args["group_weight"] = self.weight
 
-        for assignment_group in course.get_assignment_groups():
-            if assignment_group.name == self.name:
-                warning(
-                    f"An assignment group named '{self.name}' already "
-                    "exists; continuing..."
-                )
-                return
-
-        course.create_assignment_group(**assignment_group_args)
+        with existing.lock:
+            exists = self.name in existing.assignment_group_ids
+            if not exists:
+                existing.assignment_group_ids[self.name] = -1  # Claim the name
+        if exists:
+            warning(
+                f"An assignment group named '{self.name}' already "
+                "exists; continuing..."
+            )
+            return
+
+        new_group = course.create_assignment_group(**assignment_group_args)
+        with existing.lock:
+            existing.assignment_group_ids[self.name] = new_group.id
         success(f"Created assignment group '{self.name}'")
 
 
-@dataclass
+@dataclass(slots=True)
 class GroupCategory:
     """Representation of a group category."""
 
     name: str
     self_signup: Optional[str] = None
 
-    def create(self: Self, course: canvasapi.course.Course) -> None:
+    def create(
+        self: Self,
+        course: canvasapi.course.Course,
+        existing: ExistingComponents,
+    ) -> None:
         """Create the group category in the given course.
 
         Args:
             course (canvasapi.course.Course): The course to create the
               group category in
+            existing (ExistingComponents): The components that already
+              exist in the course
         """
         group_category_args = {"name": self.name}
         if self.self_signup:
             group_category_args["self_signup"] = self.self_signup
 
-        for category in course.get_group_categories():
-            if category.name == self.name:
-                warning(
-                    f"A group category named '{self.name}' already "
-                    "exists; continuing..."
-                )
-                return
-
-        course.create_group_category(**group_category_args)
+        with existing.lock:
+            exists = self.name in existing.group_category_ids
+            if not exists:
+                existing.group_category_ids[self.name] = -1  # Claim the name
+        if exists:
+            warning(
+                f"A group category named '{self.name}' already "
+                "exists; continuing..."
+            )
+            return
+
+        new_category = course.create_group_category(**group_category_args)
+        with existing.lock:
+            existing.group_category_ids[self.name] = new_category.id
         success(f"Created group category '{self.name}'")
 
 
-@dataclass
+@dataclass(slots=True)
 class QuizQuestion:
     """Representation of a question for a quiz."""
 
@@ -314,7 +416,7 @@ class QuizQuestion:
         quiz.create_question(question=question_args)
 
 
-@dataclass
+@dataclass(slots=True)
 class Quiz:
     """Representation of a quiz."""
 
@@ -329,20 +431,22 @@ class Quiz:
     questions: list[QuizQuestion] = field(default_factory=list)
     allowed_attempts: Optional[int] = None
 
-    def create(self: Self, course: canvasapi.course.Course) -> None:
+    def create(
+        self: Self,
+        course: canvasapi.course.Course,
+        existing: ExistingComponents,
+    ) -> None:
         """Create the quiz in the given course.
 
         Args:
             course (canvasapi.course.Course): The course to create the
               quiz in
+            existing (ExistingComponents): The components that already
+              exist in the course
         """
         quiz_args = {
             "title": self.title,
-            "description": "<p>"
-            + self.description.strip(" \n")
-            .replace("\n\n", "<br><br>")
-            .replace("\n", "")
-            + "</p>",
+            "description": to_html(self.description),
             "quiz_type": self.quiz_type,
             "published": False,
         }
@@ -359,13 +463,11 @@ class Quiz:
             self.quiz_type in ("assignment", "graded_survey")
             and self.assignment_group
         ):
-            found_group = False
-            for group in course.get_assignment_groups():
-                if group.name == self.assignment_group:
-                    found_group = True
-                    quiz_args["assignment_group_id"] = group.id
-                    break
-            if not found_group:
+            if self.assignment_group in existing.assignment_group_ids:
+                quiz_args["assignment_group_id"] = (
+                    existing.assignment_group_ids[self.assignment_group]
+                )
+            else:
                 error(
                     f"Couldn't add assignment '{self.title}' to assignment "
                     f"group {self.assignment_group}; no such assignment "
@@ -373,13 +475,16 @@ class Quiz:
                 )
                 sys.exit(1)
 
-        for quiz in course.get_quizzes():
-            if quiz.title == self.title:
-                warning(
-                    f"A quiz named '{self.title}' already "
-                    "exists; continuing..."
-                )
-                return
+        # Claim the title before creating, in case the same quiz is listed
+        # twice
+        with existing.lock:
+            exists = self.title in existing.quiz_titles
+            existing.quiz_titles.add(self.title)
+        if exists:
+            warning(
+                f"A quiz named '{self.title}' already exists; continuing..."
+            )
+            return
 
         new_quiz = course.create_quiz(quiz=quiz_args)
         for question in self.questions:
@@ -390,38 +495,34 @@ class Quiz:
 
 
 with open(args.attributes, "r") as f:
-    configs = yaml.safe_load(f)
+    configs = yaml.load(f, Loader=YamlLoader)
+
+assignments = [
+    Assignment(**assignment) for assignment in configs.get("assignments", [])
+]
+assignment_groups = [
+    AssignmentGroup(**assignment_group)
+    for assignment_group in configs.get("assignment_groups", [])
+]
+group_categories = [
+    GroupCategory(**category)
+    for category in configs.get("group_categories", [])
+]
 
-assignments: list[Assignment] = []
-assignment_groups: list[AssignmentGroup] = []
-group_categories: list[GroupCategory] = []
 quizzes: list[Quiz] = []
-
-if "assignments" in configs:
-    for assignment in configs["assignments"]:
-        assignments.append(Assignment(**assignment))
-
-if "assignment_groups" in configs:
-    for assignment_group in configs["assignment_groups"]:
-        assignment_groups.append(AssignmentGroup(**assignment_group))
-
-if "group_categories" in configs:
-    for category in configs["group_categories"]:
-        group_categories.append(GroupCategory(**category))
-
-if "quizzes" in configs:
-    for quiz in configs["quizzes"]:
-        questions: list[QuizQuestion] = []
-        if "questions" in quiz:
-            for question in quiz["questions"]:
-                questions.append(QuizQuestion(**question))
-        quiz["questions"] = questions
-        quizzes.append(Quiz(**quiz))
+for quiz in configs.get("quizzes", []):
+    quiz["questions"] = [
+        QuizQuestion(**question) for question in quiz.get("questions", [])
+    ]
+    quizzes.append(Quiz(**quiz))
 
 # ------------------------------------------------------------------------
 # Update the course
 # ------------------------------------------------------------------------
 
+# The number of requests to make to Canvas at once
+NUM_WORKERS = 8
+
 
 def reset_course(_course: canvasapi.course.Course) -> None:
     """Delete any pre-existing attributes from the course.
@@ -430,21 +531,37 @@ def reset_course(_course: canvasapi.course.Course) -> None:
         _course (canvasapi.course.Course): The course to delete content
           from
     """
+    # Each kind of attribute is listed only after the previous kind is
+    # deleted, as deleting one can also delete others (ex. deleting a quiz's
+    # assignment deletes the quiz). Within a kind, deletions are independent
+
     # Delete assignments
-    for assignment in _course.get_assignments():
-        assignment.delete()
+    run_parallel(
+        lambda assignment: assignment.delete(),
+        _course.get_assignments(),
+        num_workers=NUM_WORKERS,
+    )
 
     # Delete quizzes
-    for quiz in _course.get_quizzes():
-        quiz.delete()
+    run_parallel(
+        lambda quiz: quiz.delete(),
+        _course.get_quizzes(),
+        num_workers=NUM_WORKERS,
+    )
 
     # Delete assignment groups
-    for assignment_group in _course.get_assignment_groups():
-        assignment_group.delete()
+    run_parallel(
+        lambda assignment_group: assignment_group.delete(),
+        _course.get_assignment_groups(),
+        num_workers=NUM_WORKERS,
+    )
 
     # Delete group categories
-    for group_category in _course.get_group_categories():
-        group_category.delete()
+    run_parallel(
+        lambda group_category: group_category.delete(),
+        _course.get_group_categories(),
+        num_workers=NUM_WORKERS,
+    )
 
 
 if args.reset:
@@ -460,14 +577,28 @@ if args.reset:
         warning("Incorrect confirmation message", always_print=True)
     reset_course(_course)
 
-for assignment_group in assignment_groups:
-    assignment_group.create(_course)
-
-for group_category in group_categories:
-    group_category.create(_course)
+existing = find_existing(_course)
 
-for assignment in assignments:
-    assignment.create(_course)
-
-for quiz in quizzes:
-    quiz.create(_course)
+# Create each kind of component concurrently, as each creation mostly waits
+# on Canvas. Groups and categories must exist before the assignments and
+# quizzes that reference them, so the kinds are created in order
+run_parallel(
+    lambda group: group.create(_course, existing),
+    assignment_groups,
+    num_workers=NUM_WORKERS,
+)
+run_parallel(
+    lambda category: category.create(_course, existing),
+    group_categories,
+    num_workers=NUM_WORKERS,
+)
+run_parallel(
+    lambda assignment: assignment.create(_course, existing),
+    assignments,
+    num_workers=NUM_WORKERS,
+)
+run_parallel(
+    lambda quiz: quiz.create(_course, existing),
+    quizzes,
+    num_workers=NUM_WORKERS,
+)
@@ -9,12 +9,13 @@ Date: September 21st, 2024
 """
 
 import argparse
-import github
+from concurrent.futures import ThreadPoolExecutor
+import gspread
 import pydoc
 import sys
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from github_steps import _org
+from github_steps import _github, _name
 from google_steps import _sheets
 from google_steps.spreadsheet_storer import SpreadsheetStorer
 from records.tag_record import TagRecords, get_tag_headers
@@ -23,7 +24,10 @@ from records.tag_record import TagRecords, get_tag_headers
 # Arguments
 # ------------------------------------------------------------------------
 
-info_present = "-i" in sys.argv or "--info" in sys.argv
+# Check for --info first, as it makes the other arguments optional
+info_parser = argparse.ArgumentParser(add_help=False)
+info_parser.add_argument("-i", "--info", action="store_true")
+info_present = info_parser.parse_known_args()[0].info
 
 parser = argparse.ArgumentParser(
     description=(
@@ -216,7 +220,9 @@ except Exception:
     print("Make sure it exists and is shared with your service account")
     sys.exit(1)
 
-if args.tab not in [worksheet.title for worksheet in sheet.worksheets()]:
+try:
+    sheet.worksheet(args.tab)
+except gspread.WorksheetNotFound:
     print(f"Couldn't find tab '{args.tab}' in spreadsheet")
     sys.exit(1)
 
@@ -244,52 +250,129 @@ tag_records = [
 # Iterate through, checking the repos
 # ------------------------------------------------------------------------
 
-num_tag_violations = 0
+# The number of repositories to query for in one GraphQL request, and the
+# number of requests to make at once
+BATCH_SIZE = 50
+NUM_WORKERS = 4
+
+# The query for one repository's tag (by index in the batch). The tag's
+# target is the commit it references
+REPO_QUERY = (
+    "r{idx}: repository(owner: $owner, name: $repo{idx}) {{"
+    " ref(qualifiedName: $tag{idx}) {{"
+    " target {{ oid ... on Tag {{ target {{ oid }} }} }} }} }}"
+)
+
+
+def get_tag_shas(
+    records: list[LabTagRecords],
+) -> list[tuple[Optional[str], Optional[str]]]:
+    """Get the SHAs of the tags for a batch of repositories.
+
+    All repositories are queried for in one GraphQL request, rather than
+    with two REST requests per repository.
+
+    Args:
+        records (list[LabTagRecords]): The records of the repositories
+
+    Returns:
+        list[tuple[Optional[str], Optional[str]]]: The SHA of each
+          repository's tag and of the commit it references, in the order of
+          the records. Either is None if it couldn't be found
+    """
+    params = ["$owner: String!"]
+    variables = {"owner": _name}
+    fields = []
+    for idx, record in enumerate(records):
+        params.append(f"$repo{idx}: String!, $tag{idx}: String!")
+        variables[f"repo{idx}"] = record.repo_name
+        variables[f"tag{idx}"] = f"refs/tags/{getattr(record, args.lab).name}"
+        fields.append(REPO_QUERY.format(idx=idx))
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+
+    _, response = _github.requester.requestJsonAndCheck(
+        "POST", "/graphql", input={"query": query, "variables": variables}
+    )
 
-for record in tag_records:
+    # Missing repositories are null (with a NOT_FOUND error), as are missing
+    # tags; any other error (ex. rate limiting) means the batch wasn't checked
+    for error in response.get("errors") or []:
+        if error.get("type") != "NOT_FOUND":
+            raise Exception(
+                f"Couldn't query tags: {error.get('message', error)}"
+            )
+    data = response.get("data") or {}
+    shas: list[tuple[Optional[str], Optional[str]]] = []
+    for idx in range(len(records)):
+        ref = (data.get(f"r{idx}") or {}).get("ref")
+        if ref is None:
+            shas.append((None, None))
+        else:
+            target = ref["target"]
+            commit = target.get("target") or {}
+            shas.append((target["oid"], commit.get("oid")))
+    return shas
+
+
+def check_tag(
+    record: LabTagRecords,
+    tag_sha: Optional[str],
+    tag_commit_sha: Optional[str],
+) -> tuple[Callable[..., None], tuple[Any, ...]]:
+    """Check that a repository's tag matches the recorded one.
+
+    Args:
+        record (LabTagRecords): The record of the repository to check
+        tag_sha (Optional[str]): The SHA of the repository's tag, if found
+        tag_commit_sha (Optional[str]): The SHA of the commit the tag
+          references, if found
+
+    Returns:
+        tuple[Callable[..., None], tuple[Any, ...]]: The function to print
+          the result with, and the arguments to print it with
+    """
     repo_name = record.repo_name
-    issue_with_repo = False
 
     lab_tag = getattr(record, args.lab)
     tag_name = lab_tag.name
     ref_sha = lab_tag.ref_sha
     commit_sha = lab_tag.commit_sha
 
-    # Check the actual values
-    repo = _org.get_repo(repo_name)
-
     # Check the reference SHA
-    tag_ref_name = f"refs/tags/{tag_name}"
-    refs = repo.get_git_refs()
-    tag_ref: Optional[github.GitRef.GitRef] = None
-    for ref in refs:
-        if ref.ref == tag_ref_name:
-            tag_ref = ref
-    if tag_ref is None:
-        print_no_tag(repo_name, tag_name)
-        issue_with_repo = True
-    elif tag_ref.object is None:
-        print_no_tag(repo_name, tag_name)
-        issue_with_repo = True
-    elif tag_ref.object.sha != ref_sha:
-        print_ref_sha_mismatch(repo_name, tag_name, ref_sha, tag_ref.object.sha)
-        issue_with_repo = True
+    if tag_sha is None:
+        return print_no_tag, (repo_name, tag_name)
+    if tag_sha != ref_sha:
+        return print_ref_sha_mismatch, (repo_name, tag_name, ref_sha, tag_sha)
 
     # Check the commit SHA
-    if not issue_with_repo:
-        git_tag = repo.get_git_tag(ref_sha)
-        if git_tag.object is None:
-            print_no_object(repo_name, tag_name)
-            issue_with_repo = True
-        elif git_tag.object.sha != commit_sha:
-            issue_with_repo = True
-            print_commit_sha_mismatch(
-                repo_name, tag_name, commit_sha, git_tag.object.sha
-            )
+    if tag_commit_sha is None:
+        return print_no_object, (repo_name, tag_name)
+    if tag_commit_sha != commit_sha:
+        return print_commit_sha_mismatch, (
+            repo_name,
+            tag_name,
+            commit_sha,
+            tag_commit_sha,
+        )
+
+    return print_good_tag, (repo_name, tag_name)
+
+
+batches = [
+    tag_records[idx : idx + BATCH_SIZE]
+    for idx in range(0, len(tag_records), BATCH_SIZE)
+]
 
-    if issue_with_repo:
-        num_tag_violations += 1
-    else:
-        print_good_tag(repo_name, tag_name)
+num_tag_violations = 0
+
+with ThreadPoolExecutor(max_workers=NUM_WORKERS) as executor:
+    for batch, batch_shas in zip(batches, executor.map(get_tag_shas, batches)):
+        for record, (tag_sha, tag_commit_sha) in zip(batch, batch_shas):
+            print_result, result_args = check_tag(
+                record, tag_sha, tag_commit_sha
+            )
+            print_result(*result_args)
+            if print_result is not print_good_tag:
+                num_tag_violations += 1
 
 sys.exit(num_tag_violations)
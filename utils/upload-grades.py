@@ -7,18 +7,25 @@ Date: October 28th, 2024
 
 import argparse
 import canvasapi
+import gspread
 import pydoc
 import sys
-from typing import Optional, TypedDict, Union
+from threading import Lock
+import time
+from typing import Any, Optional, TypedDict, Union
 
 from canvas_steps import _course
 from google_steps import _sheets
+from utils.parallel import run_parallel
 
 # ------------------------------------------------------------------------
 # Arguments
 # ------------------------------------------------------------------------
 
-info_present = "-i" in sys.argv or "--info" in sys.argv
+# Check for --info first, as it makes the other arguments optional
+info_parser = argparse.ArgumentParser(add_help=False)
+info_parser.add_argument("-i", "--info", action="store_true")
+info_present = info_parser.parse_known_args()[0].info
 
 parser = argparse.ArgumentParser(
     description=("A script to upload grades from a Google Sheet to Canvas"),
@@ -130,34 +137,48 @@ else:
     GREEN = "\033[1;32m"
     END = "\033[0m"
 
+# Grades are uploaded concurrently, so messages are printed one at a time
+# to avoid interleaving
+print_lock = Lock()
+
 
 def warning(msg: str) -> None:
     """Print a warning."""
     if not args.silent:
-        print(f"{YELLOW}{msg}{END}")
+        with print_lock:
+            print(f"{YELLOW}{msg}{END}")
 
 
 def success(msg: str) -> None:
     """Print a success indicator."""
     if not args.silent:
-        print(f"{GREEN}{msg}{END}")
+        with print_lock:
+            print(f"{GREEN}{msg}{END}")
 
 
 def error(msg: str) -> None:
     """Print an error."""
     if not args.silent:
-        print(f"{RED}{msg}{END}")
+        with print_lock:
+            print(f"{RED}{msg}{END}")
 
 
 # ------------------------------------------------------------------------
 # Get the assignment, as well as all of the rubric criteria
 # ------------------------------------------------------------------------
 
-assignment: Optional[canvasapi.assignment.Assignment] = None
-
-for curr_assignment in _course.get_assignments():
-    if curr_assignment.name == args.assignment:
-        assignment = curr_assignment
+# Have Canvas narrow down the assignments by name (the search is a partial
+# match, so still check for the exact name)
+assignment: Optional[canvasapi.assignment.Assignment] = next(
+    (
+        curr_assignment
+        for curr_assignment in _course.get_assignments(
+            search_term=args.assignment, per_page=100
+        )
+        if curr_assignment.name == args.assignment
+    ),
+    None,
+)
 
 if assignment is None:
     error(f"Couldn't find assignment '{args.assignment}'")
@@ -222,13 +243,19 @@ class StudentGrade(TypedDict):
 
 
 def grade_from_row(
-    row: list[str], headers: list[str], row_idx: int
+    row: list[str],
+    header_idx: dict[str, int],
+    rubric_cols: list[tuple[str, int]],
+    row_idx: int,
 ) -> StudentGrade:
     """Create a grade from a spreadsheet row entry.
 
     Args:
         row (list[str]): The row to get data from
-        headers (list[str]): The headers to index based on
+        header_idx (dict[str, int]): The column index of each header
+        rubric_cols (list[tuple[str, int]]): The name and column index of
+          each rubric criterion
+        row_idx (int): The index of the row in the worksheet
 
     Returns:
         StudentGrade: The resulting grade object
@@ -238,21 +265,17 @@ def grade_from_row(
         """Get a value from the row, indexing based on the headers.
 
         Args:
-            row (list[str]): The row to get data from
-            val (str): The field to get the data of
+            field (str): The field to get the data of
 
         Returns:
             str: The resulting data
         """
-        return row[headers.index(field)]
+        return row[header_idx[field]]
 
     try:
         netid = get_row_val("NetID")
         grade = cast_to_grade(get_row_val("Grade"))
-        rubric = {
-            name: float(get_row_val(name))
-            for name in criteria_id_name_mapping.values()
-        }
+        rubric = {name: float(row[col]) for name, col in rubric_cols}
     except Exception as e:
         error(
             f"Error converting grade data in row {row_idx} to a float: {str(e)}"
@@ -279,24 +302,24 @@ except Exception:
     print("Make sure it exists and is shared with your service account")
     sys.exit(1)
 
-if args.tab not in [worksheet.title for worksheet in sheet.worksheets()]:
+try:
+    worksheet = sheet.worksheet(args.tab)
+except gspread.WorksheetNotFound:
     print(f"Couldn't find tab '{args.tab}' in spreadsheet")
     sys.exit(1)
 
 # Get the records from the spreadsheet
-worksheet = sheet.worksheet(args.tab)
 data = worksheet.get_all_values()
 
-# Iterate to find headers
-header_rank = 0
-worksheet_headers = data[0]
-while "Grade" not in worksheet_headers:
-    if header_rank < len(data) - 1:
-        header_rank += 1
-        worksheet_headers = data[header_rank]
-    else:
-        error("Couldn't find header 'Grade' in worksheet; aborting...")
-        sys.exit(1)
+# Find the headers (the first row with a 'Grade' column), stopping at the
+# first match
+header_rank = next(
+    (row_idx for row_idx, row in enumerate(data) if "Grade" in row), None
+)
+if header_rank is None:
+    error("Couldn't find header 'Grade' in worksheet; aborting...")
+    sys.exit(1)
+worksheet_headers = data[header_rank]
 
 # Make sure we have all the required headers
 if "NetID" not in worksheet_headers:
@@ -313,27 +336,43 @@ for criteria_name in criteria_id_name_mapping.values():
 # Get the actual student data
 grades: dict[str, StudentGrade] = {}
 
-for idx, row in enumerate(data[(header_rank + 1) :]):
-    grade = grade_from_row(row, worksheet_headers, header_rank + 1 + idx)
+# Find the columns once, rather than for each row. Use the first column of
+# any repeated header
+header_idx: dict[str, int] = {}
+for col, header in enumerate(worksheet_headers):
+    header_idx.setdefault(header, col)
+rubric_cols = [
+    (name, header_idx[name]) for name in criteria_id_name_mapping.values()
+]
+
+# Index the rows in place, rather than copying those after the headers
+for row_idx in range(header_rank + 1, len(data)):
+    grade = grade_from_row(data[row_idx], header_idx, rubric_cols, row_idx)
     grades[grade["netid"]] = grade
 
 # ------------------------------------------------------------------------
 # Upload the grades
 # ------------------------------------------------------------------------
 
+# The number of requests to make to Canvas at once
+NUM_WORKERS = 8
+
+# Only include what we use from each submission; existing rubric
+# assessments are overwritten, and comments are only needed to delete them
 if is_group_assignment:
-    submissions = assignment.get_submissions(
-        include=["rubric_assessment", "group", "submission_comments"],
-        grouped=True,
-    )
+    include = ["group"]
 else:
-    submissions = assignment.get_submissions(
-        include=["rubric_assessment", "user", "submission_comments"]
-    )
+    include = ["user"]
+if args.delete_comments:
+    include.append("submission_comments")
+
+submissions = assignment.get_submissions(
+    include=include, grouped=is_group_assignment, per_page=100
+)
 
 
-def delete_comments(submission: canvasapi.submission.Submission) -> None:
-    """Hacky way to delete existing comments.
+def comment_endpoints(submission: canvasapi.submission.Submission) -> list[str]:
+    """Hacky way to find the endpoints to delete existing comments.
 
     There exists an API endpoint for this (what we use), just not a
     Python wrapper (at time of writing).
@@ -341,9 +380,11 @@ def delete_comments(submission: canvasapi.submission.Submission) -> None:
     Args:
         submission (canvasapi.submission.Submission): The submission
         to delete the comments of
+
+    Returns:
+        list[str]: The endpoint to delete each of the submission's comments
     """
     comments = submission.submission_comments
-    requester = submission._requester
 
     # Metadata needed for endpoint
     course_id = submission.course_id
@@ -354,50 +395,144 @@ def delete_comments(submission: canvasapi.submission.Submission) -> None:
         f"/submissions/{user_id}/comments/"
     )
 
-    for comment in comments:
-        comment_id = comment["id"]
-        endpoint = partial_endpoint + str(comment_id)
-        requester.request("DELETE", endpoint)
+    return [partial_endpoint + str(comment["id"]) for comment in comments]
 
 
-for submission in submissions:
+# Bound here (where the assignment is known to exist), as the check
+# doesn't carry into functions
+requester = assignment._requester
+
+
+def delete_comment(endpoint: str) -> None:
+    """Delete a comment.
+
+    Args:
+        endpoint (str): The endpoint for the comment (from comment_endpoints)
+    """
+    requester.request("DELETE", endpoint)
+
+
+# The grades to upload, with the submission they're for
+to_upload: list[tuple[str, canvasapi.submission.Submission, StudentGrade]] = []
+
+# The NetIDs (or group names) of the grades claimed by a submission; grades
+# is left intact, so that unclaimed grades can be reported at the end
+matched: set[str] = set()
+
+# The endpoints of the comments to delete
+to_delete: list[str] = []
+
+
+def claim_grade(submission: canvasapi.submission.Submission) -> None:
+    """Find the grade for a submission, if one was given.
+
+    Args:
+        submission (canvasapi.submission.Submission): The submission to
+          grade
+    """
     if args.delete_comments:
-        delete_comments(submission)
-    netid = (
-        submission.group["name"]
-        if is_group_assignment
-        else submission.user["login_id"]
-    )
-    if netid not in grades:
-        if is_group_assignment and submission.group["name"] is not None:
-            warning(f"No grade found for '{netid}'; skipping...")
-        if (not is_group_assignment) and submission.user[
-            "name"
-        ] != "Test Student":
-            warning(f"No grade found for '{netid}'; skipping...")
+        to_delete.extend(comment_endpoints(submission))
+    # Don't warn about students without a group, or the test student
+    if is_group_assignment:
+        netid = submission.group["name"]
+        warn_if_missing = netid is not None
     else:
-        if is_group_assignment:
-            grade = grades[submission.group["name"]]
-        else:
-            grade = grades[netid]
-        update_rubric = {
-            rubric_id: {"points": grade["rubric"][rubric_value]}
-            for rubric_id, rubric_value in criteria_id_name_mapping.items()
-        }
-        update_kwargs = {
-            "submission": {"posted_grade": grade["grade"]},
-            "rubric_assessment": update_rubric,
+        netid = submission.user["login_id"]
+        warn_if_missing = submission.user["name"] != "Test Student"
+
+    grade = grades.get(netid)
+    if grade is not None:
+        matched.add(netid)
+        to_upload.append((netid, submission, grade))
+    elif warn_if_missing:
+        warning(f"No grade found for '{netid}'; skipping...")
+
+
+# The ID and name of each rubric criterion, listed once for all grades
+criteria_pairs = list(criteria_id_name_mapping.items())
+
+
+def rubric_assessment(grade: StudentGrade) -> dict[str, dict[str, float]]:
+    """Get the rubric assessment for a grade.
+
+    Args:
+        grade (StudentGrade): The grade to assess
+
+    Returns:
+        dict[str, dict[str, float]]: The points for each rubric criterion,
+          by the criterion's ID
+    """
+    return {
+        rubric_id: {"points": grade["rubric"][rubric_value]}
+        for rubric_id, rubric_value in criteria_pairs
+    }
+
+
+def upload_grade(
+    upload: tuple[str, canvasapi.submission.Submission, StudentGrade],
+) -> None:
+    """Upload the grade for a single submission.
+
+    Args:
+        upload (tuple[str, canvasapi.submission.Submission, StudentGrade]):
+          The NetID (or group name), submission, and grade to upload
+    """
+    netid, submission, grade = upload
+    update_kwargs = {
+        "submission": {"posted_grade": grade["grade"]},
+        "rubric_assessment": rubric_assessment(grade),
+    }
+    if grade["comment"]:
+        update_kwargs["comment"] = {
+            "text_comment": grade["comment"],
+            "group_comment": True,
         }
-        if grade["comment"]:
-            update_kwargs["comment"] = {
-                "text_comment": grade["comment"],
-                "group_comment": True,
-            }
-        submission.edit(**update_kwargs)
-        success(f"Updated grade for '{netid}'")
-        del grades[netid]
+    submission.edit(**update_kwargs)
+    success(f"Updated grade for '{netid}'")
+
+
+for submission in submissions:
+    claim_grade(submission)
+
+# Delete all old comments at once (before any new comments are added), as
+# each deletion mostly waits on Canvas
+run_parallel(delete_comment, to_delete, num_workers=NUM_WORKERS)
+
+# Upload all of the grades in one bulk request, which Canvas applies in the
+# background
+grade_data: dict[int, dict[str, Any]] = {}
+for netid, submission, grade in to_upload:
+    grade_data[submission.user_id] = {
+        "posted_grade": grade["grade"],
+        "rubric_assessment": rubric_assessment(grade),
+    }
+    if grade["comment"]:
+        grade_data[submission.user_id]["text_comment"] = grade["comment"]
+        grade_data[submission.user_id]["group_comment"] = True
+
+# How often (in seconds) to check on the bulk upload
+PROGRESS_POLL_INTERVAL = 2
+
+if grade_data:
+    progress = assignment.submissions_bulk_update(grade_data=grade_data)
+    while progress.workflow_state in ("queued", "running"):
+        time.sleep(PROGRESS_POLL_INTERVAL)
+        progress = progress.query()
+
+    if progress.workflow_state == "completed":
+        for netid, _, _ in to_upload:
+            success(f"Updated grade for '{netid}'")
+    else:
+        # Canvas doesn't report which grades failed, so upload each one
+        warning(
+            f"Bulk upload failed ({getattr(progress, 'message', None)}); "
+            "uploading each grade individually..."
+        )
+        run_parallel(upload_grade, to_upload, num_workers=NUM_WORKERS)
 
 success("All grades uploaded")
 
+# Report unclaimed grades in the order of the sheet
 for netid in grades:
-    warning(f"Grade given for '{netid}', but not found on Canvas")
+    if netid not in matched:
+        warning(f"Grade given for '{netid}', but not found on Canvas")